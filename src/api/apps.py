@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ApiConfig(AppConfig):
+    name = 'api'
+
+    def ready(self):
+        # connects receivers of the modules, otherwise they are imported only with the urls
+        from . import auth, counts  # noqa: F401
+        from .main import cache, snapshots  # noqa: F401
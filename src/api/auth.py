@@ -1,7 +1,117 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from rest_framework.authentication import BaseAuthentication, get_authorization_header
 from rest_framework.exceptions import AuthenticationFailed
 
-from hypertest.user.models import VKUserToken
+from hypertest.main.background import ProcessState
+from hypertest.user.models import VKUser, VKUserToken
+from hypertest.user.tokens import InvalidToken, is_signed_token, verify_signed_token
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of token -> (VKUser id, coins) with TTL.
+
+    Every worker process has its own cache, entries are checked against the user's version in the shared cache
+    at most every `version_interval` seconds, so hits don't make a round trip on every request. Changes of tokens
+    and users replace the version, other processes stop serving the user's entries within `version_interval`.
+    """
+
+    def __init__(self, max_size=10000, ttl=60, version_interval=5):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version_interval = version_interval
+
+        self.lock = threading.Lock()
+        self.items = OrderedDict()
+        self.process = ProcessState()
+
+        self.hits = 0
+        self.misses = 0
+
+    def check_pid(self):
+        # forked worker must not serve entries invalidated in another process
+        if self.process.is_new():
+            self.items.clear()
+            self.hits = self.misses = 0
+
+    @staticmethod
+    def get_version(user_id):
+        # evicted version is replaced by a new one, so entries cached before are not served
+        return cache.get_or_set(f'auth:user:{user_id}', lambda: uuid.uuid4().hex, None)
+
+    def get(self, token):
+        now = time.monotonic()
+        with self.lock:
+            self.check_pid()
+            item = self.items.get(token)
+
+        valid = item is not None and item[0] >= now
+        if valid and item[3] + self.version_interval < now:
+            valid = item[2] == self.get_version(item[1][0])
+            checked = (item[0], item[1], item[2], now)
+        else:
+            checked = item
+
+        if valid:
+            with self.lock:
+                if self.items.get(token) is item:
+                    self.items[token] = checked
+                    self.items.move_to_end(token)
+                self.hits += 1
+            return item[1]
+
+        with self.lock:
+            if item is not None and self.items.get(token) is item:
+                del self.items[token]
+            self.misses += 1
+        return None
+
+    def set(self, token, user_id, coins):
+        if not self.ttl or not self.max_size:
+            return
+
+        version = self.get_version(user_id)
+        with self.lock:
+            self.check_pid()
+
+            now = time.monotonic()
+            self.items[token] = (now + self.ttl, (user_id, coins), version, now)
+            self.items.move_to_end(token)
+            while len(self.items) > self.max_size:
+                self.items.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        cache.set(f'auth:user:{user_id}', uuid.uuid4().hex, None)
+        with self.lock:
+            for token in [token for token, (_, value, _, _) in self.items.items() if value[0] == user_id]:
+                del self.items[token]
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+token_cache = TokenCache(**getattr(settings, 'AUTH_TOKEN_CACHE', {}))
+
+
+@receiver(post_save, sender=VKUserToken)
+@receiver(post_delete, sender=VKUserToken)
+def invalidate_token(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=VKUser)
+@receiver(post_delete, sender=VKUser)
+def invalidate_user(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
 
 
 class VKUserAuthentication(BaseAuthentication):
@@ -26,12 +136,27 @@ class VKUserAuthentication(BaseAuthentication):
         return self.authenticate_credentials(token)
 
     def authenticate_credentials(self, token):
+        if is_signed_token(token):
+            try:
+                user_id, _ = verify_signed_token(token)
+            except InvalidToken as e:
+                raise AuthenticationFailed(str(e))
+            # other fields are loaded on demand
+            return VKUser.from_db(VKUser.objects.db, ['id'], [user_id]), token
+
+        cached = token_cache.get(token)
+        if cached is not None:
+            return VKUser.from_db(VKUser.objects.db, ['id', 'coins'], cached), token
+
         try:
-            vk_user_token = VKUserToken.objects.get(token=token)
+            vk_user_token = VKUserToken.objects.select_related('user').get(token=token)
         except VKUserToken.DoesNotExist:
             raise AuthenticationFailed('Invalid token')
 
-        return vk_user_token.user, token
+        user = vk_user_token.user
+        token_cache.set(token, user.id, user.coins)
+
+        return user, token
 
     def authenticate_header(self, request):
         return self.keyword
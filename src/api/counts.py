@@ -0,0 +1,122 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.dispatch import receiver
+
+from hypertest.main.signals import catalog_changed
+
+PUBLISHED_TESTS_COUNT_KEY = 'counts:tests:published'
+GENERATION_KEY = 'counts:generation'
+
+
+def get_generation(key=GENERATION_KEY) -> int:
+    return cache.get_or_set(key, get_generation_seed, None)
+
+
+def bump_generation(key=GENERATION_KEY):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # generations used before the key was evicted are not reused
+        cache.set(key, get_generation_seed(), None)
+
+
+def get_generation_seed() -> int:
+    return time.time_ns() // 1000
+
+
+@receiver(catalog_changed)
+def update_counts(sender, published, was_published, **kwargs):
+    # lists of drafts are refreshed after the ttl
+    bump_generation()
+    if published != was_published:
+        try:
+            cache.incr(PUBLISHED_TESTS_COUNT_KEY, 1 if published else -1)
+        except ValueError:
+            pass
+
+
+class CountProvider:
+    """
+    Total count of a paginated queryset, returns (count, exact).
+
+    Counts are cached per query signature for `ttl` seconds, they are invalidated when published tests are
+    changed, published, unpublished or deleted. Views may declare `maintained_count_key` of the published tests'
+    unfiltered count, it is counted once per `maintained_ttl` seconds and adjusted when tests are published,
+    unpublished or deleted. The ttls bound staleness after changes of drafts and changes which don't send signals,
+    e.g. `QuerySet.update()`. On PostgreSQL planner's estimate is used instead of COUNT(*) when it is above
+    `estimate_threshold`.
+    """
+
+    def __init__(self, ttl=30, maintained_ttl=10 * 60, estimate_threshold=100000):
+        self.ttl = ttl
+        self.maintained_ttl = maintained_ttl
+        self.estimate_threshold = estimate_threshold
+
+    def count(self, queryset, view=None, request=None):
+        if queryset.query.is_empty():
+            return 0, True
+
+        maintained_count_key = self.get_maintained_count_key(view, request)
+        if maintained_count_key is not None:
+            count = cache.get(maintained_count_key)
+            if count is None:
+                count = queryset.count()
+                cache.set(maintained_count_key, count, self.maintained_ttl)
+            return count, True
+
+        key = self.get_key(queryset)
+        generation = get_generation()
+
+        cached = cache.get(key, version=generation)
+        if cached is not None:
+            return cached
+
+        result = None
+        if self.estimate_threshold is not None:
+            estimate = self.estimate(queryset)
+            if estimate is not None and estimate >= self.estimate_threshold:
+                result = (estimate, False)
+        if result is None:
+            result = (queryset.count(), True)
+
+        cache.set(key, result, self.ttl, version=generation)
+        return result
+
+    @staticmethod
+    def get_maintained_count_key(view, request):
+        maintained_count_key = getattr(view, 'maintained_count_key', None)
+        if maintained_count_key and request is not None:
+            filterset_class = getattr(view, 'filterset_class', None)
+            filters = filterset_class.base_filters.keys() if filterset_class is not None else []
+            if not any(name in request.query_params for name in filters):
+                return maintained_count_key
+        return None
+
+    @staticmethod
+    def get_key(queryset):
+        sql, params = queryset.query.sql_with_params()
+        signature = hashlib.md5(json.dumps([sql, [str(param) for param in params]]).encode()).hexdigest()
+        return f'counts:{signature}'
+
+    @staticmethod
+    def estimate(queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+count_provider = CountProvider(**getattr(settings, 'PAGINATION_COUNT', {}))
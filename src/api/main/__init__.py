@@ -1,2 +1,2 @@
 from .views import test_list_view, test_detail_view, my_tests_list_view, my_tests_detail_view, TestPassView, \
-    passed_tests_list_view, passed_tests_detail_view
+    TestSuggestView, passed_tests_list_view, passed_tests_detail_view, passed_tests_history_view, PictureUploadView
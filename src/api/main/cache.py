@@ -0,0 +1,79 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import receiver
+
+from hypertest.main.signals import catalog_changed, tests_passed
+
+from api.counts import get_generation, bump_generation
+
+CATALOG_GENERATION_KEY = 'catalog:generation'
+
+
+class CatalogCache:
+    """
+    Shared cache of the published tests' list responses.
+
+    Responses are the same for every user except `passed` flags which are overlaid after the cache hit, so
+    requests filtered by `passed` are not cached. Cached pages are dropped by the generation bump when a published
+    test is changed or deleted, a test is published, or `passed_count` of a test drifts by `passed_count_drift`.
+    """
+
+    def __init__(self, enabled=True, ttl=60, passed_count_drift=10):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.passed_count_drift = passed_count_drift
+
+    @staticmethod
+    def get_generation():
+        return get_generation(CATALOG_GENERATION_KEY)
+
+    @staticmethod
+    def invalidate():
+        bump_generation(CATALOG_GENERATION_KEY)
+
+    def get_key(self, request, view):
+        if not self.enabled or 'passed' in request.query_params:
+            return None
+
+        paginator = view.paginator
+        names = [paginator.page_query_param, paginator.page_size_query_param, paginator.cursor_query_param]
+        names += [name for name in view.filterset_class.base_filters if name != 'passed']
+
+        params = [[name, request.query_params.get(name)] for name in sorted(names)]
+        return 'catalog:' + hashlib.md5(json.dumps(params).encode()).hexdigest()
+
+    def get(self, key):
+        return cache.get(key, version=self.get_generation())
+
+    def set(self, key, data):
+        cache.set(key, data, self.ttl, version=self.get_generation())
+
+    def passed(self, counts):
+        generation = self.get_generation()
+        for test_id, count in counts.items():
+            key = f'catalog:drift:{test_id}'
+            try:
+                drift = cache.incr(key, count, version=generation)
+            except ValueError:
+                cache.set(key, count, self.ttl, version=generation)
+                drift = count
+
+            if drift >= self.passed_count_drift:
+                self.invalidate()
+                return
+
+
+catalog_cache = CatalogCache(**getattr(settings, 'CATALOG_CACHE', {}))
+
+
+@receiver(catalog_changed)
+def invalidate_catalog(sender, **kwargs):
+    catalog_cache.invalidate()
+
+
+@receiver(tests_passed)
+def count_catalog_drift(sender, counts, **kwargs):
+    catalog_cache.passed(counts)
@@ -0,0 +1,32 @@
+import json
+
+from django.db.models import Prefetch
+
+from hypertest.main.models import Question, Answer
+
+# fields of TestSerializer which are materialized in Test.content
+CONTENT_FIELDS = ['results', 'questions']
+
+
+def get_content_lookups():
+    """Prefetch lookups of the normalized content rendered by TestSerializer"""
+    answers = Answer.objects.select_related('result')
+    questions = Question.objects.prefetch_related(Prefetch('answers', queryset=answers))
+    return ['results', Prefetch('questions', queryset=questions)]
+
+
+def get_loaded_content(test) -> dict or None:
+    """Materialized content of the test if it is loaded from the database, it is parsed once per instance"""
+    content = test.__dict__.get('content')
+    if content is None:
+        return None
+
+    parsed = test.__dict__.get('_parsed_content')
+    if parsed is None or parsed[0] is not content:
+        parsed = test._parsed_content = (content, json.loads(content))
+    return parsed[1]
+
+
+def set_rendered_content(test, content):
+    """Content rendered from the normalized tables is kept by the following save of the test"""
+    test.content = test._rendered_content = content
@@ -7,10 +7,18 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.fields import SkipField
 from rest_framework.serializers import ImageField
 
+from hypertest.main.derivatives import derivatives
+from hypertest.main.models import PictureUpload
+from hypertest.main.storage import pictures_storage
+
 
 class PictureField(ImageField):
     error_message = 'Некорретная строка base64, ожидаемый формат data:image/{формат};base64,{base64}. ' \
                     'Чтобы удалить файл отправьте пустую строку'
+    upload_error_message = 'Загруженная картинка не найдена'
+
+    # pictures uploaded to /api/pictures are referenced as upload:{id}
+    handle_prefix = 'upload:'
 
     def validate_empty_values(self, data):
         if data == '':
@@ -24,8 +32,21 @@ class PictureField(ImageField):
         if data.startswith('http') and self.root.instance:
             raise SkipField
 
+        if data.startswith(self.handle_prefix):
+            return self.get_uploaded_name(data)
+
         return super().to_internal_value(self.deserialize_base64(data))
 
+    def get_uploaded_name(self, handle):
+        try:
+            upload = PictureUpload.objects.get(pk=int(handle[len(self.handle_prefix):]),
+                                               user=self.context['request'].user)
+        except (ValueError, PictureUpload.DoesNotExist):
+            raise ValidationError(self.upload_error_message)
+
+        # the stored file is referenced by its name
+        return upload.file.name
+
     def deserialize_base64(self, data):
         good = False
 
@@ -48,13 +69,48 @@ class PictureField(ImageField):
         if not value:
             return None
 
+        # materialized content stores names of pictures, their urls depend on the request
+        if self.context.get('stored'):
+            return value.name
+
         try:
             url = value.url
         except AttributeError:
             return None
 
+        return self.get_absolute_url(url)
+
+    def stored_to_representation(self, name):
+        return self.get_absolute_url(pictures_storage.url(name)) if name else None
+
+    def get_absolute_url(self, url):
         request = self.context.get('request', None)
         if request is not None:
-            return 'https://hypertests.ru/' + value.url
+            return 'https://hypertests.ru/' + url
 
         return url
+
+
+class PictureVariantsField(PictureField):
+    """Urls of the picture's derivatives by size and format, the original picture is used until they are ready"""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+
+        ready = derivatives.is_ready(value.name)
+        variants = {size: {fmt: name if ready else value.name for fmt, name in formats.items()}
+                    for size, formats in derivatives.get_names(value.name).items()}
+        return variants if self.context.get('stored') else self.stored_to_representation(variants)
+
+    def stored_to_representation(self, variants):
+        if not variants:
+            return None
+
+        return {size: {fmt: super(PictureVariantsField, self).stored_to_representation(name)
+                       for fmt, name in formats.items()}
+                for size, formats in variants.items()}
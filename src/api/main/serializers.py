@@ -1,14 +1,21 @@
+import json
 from typing import Type
 
-from django.db.models import Q
+from django.db import models, transaction
+from django.db.models import prefetch_related_objects
 from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from hypertest.main.models import Test, Result, Question, Answer, TestPass
+from hypertest.main.collector import pictures_collector
+from hypertest.main.derivatives import derivatives
+from hypertest.main.models import Test, Result, Question, Answer, TestPass, PictureUpload
 from hypertest.user.models import VKUser
 
-from api.main.fields import PictureField
+from api.main.content import CONTENT_FIELDS, get_content_lookups, get_loaded_content, set_rendered_content
+from api.main.fields import PictureField, PictureVariantsField
+from api.main.upsert import save_test_content
+from api.main.validation import Invalid, get_compiled_serializer
 from api.common import prettify_validation_error
 
 
@@ -22,6 +29,7 @@ ID_ERROR_MESSAGES = {
 
 class TestElementListField(serializers.ListField):
     id_field = serializers.IntegerField()
+    fast_validation = True
 
     def __init__(self, serializer, id_field_name, model_id_field_name, parent_field_name, errors_hack=False,
                  *args, **kwargs):
@@ -47,16 +55,29 @@ class TestElementListField(serializers.ListField):
             raise ValidationError({self.id_field_name: msg})
 
         if self.root.instance is not None:
-            lookup = {
-                self.model_if_field_name: value,
-                self.parent_field_name: self.parent.instance
+            parent = self.parent.instance
+            if parent is None:
+                return None
+            return self.get_existing_objects().get((parent.pk, value))
+
+    def get_existing_objects(self):
+        """Existing children of the root instance keyed by (parent pk, id), loaded with one query per level"""
+        existing_children = self.root.existing_children
+        if self.field_name not in existing_children:
+            # build lookup from the model to the root instance, e.g. question__test for answers
+            path = [self.parent_field_name]
+            field = self.parent.parent
+            while isinstance(field, TestElementListField):
+                path.append(field.parent_field_name)
+                field = field.parent.parent
+
+            parent_attname = self.model._meta.get_field(self.parent_field_name).attname
+            queryset = self.model.objects.filter(**{'__'.join(path): self.root.instance})
+            existing_children[self.field_name] = {
+                (getattr(obj, parent_attname), getattr(obj, self.model_if_field_name)): obj for obj in queryset
             }
-            try:
-                obj = self.model.objects.get(**lookup)
-            except self.model.DoesNotExist:
-                obj = None
 
-            return obj
+        return existing_children[self.field_name]
 
     def run_obj_validation(self, data):
         if self.id_field_name not in data:
@@ -70,17 +91,52 @@ class TestElementListField(serializers.ListField):
 
         return serializer
 
+    def get_attribute(self, instance):
+        # results and questions of tests are read from the materialized content if it is loaded
+        if isinstance(instance, Test):
+            content = get_loaded_content(instance)
+            if content is not None:
+                return content[self.field_name]
+        return super().get_attribute(instance)
+
+    def run_fast_validation(self, data):
+        compiled_serializer = get_compiled_serializer(self.serializer)
+        if compiled_serializer is None or getattr(self.root, 'partial', False):
+            raise Invalid
+
+        objects = []
+        objects_ids = set()
+
+        for item in data:
+            validated_obj = compiled_serializer.validate(item, self.representation_serializer)
+
+            obj_id = validated_obj[self.model_if_field_name]
+            if obj_id in objects_ids:
+                raise Invalid
+            objects_ids.add(obj_id)
+
+            objects.append(validated_obj)
+
+        return objects
+
     def run_child_validation(self, data):
+        # valid payloads skip per-item serializers, errors are always reported by them
+        if self.fast_validation:
+            try:
+                return self.run_fast_validation(data)
+            except Invalid:
+                pass
+
         objects = []
         errors = {}
         objects_ids = {}
 
         for idx, item in enumerate(data):
             try:
-                validated_obj = self.run_obj_validation(item)
+                validated_obj = self.run_obj_validation(item).validated_data
                 objects.append(validated_obj)
 
-                obj_id = validated_obj.validated_data[self.model_if_field_name]
+                obj_id = validated_obj[self.model_if_field_name]
                 if obj_id in objects_ids:
                     msg = ID_ERROR_MESSAGES['duplicates'].format(name=self.id_field_name)
                     errors[idx] = errors[objects_ids[obj_id]] = msg
@@ -102,8 +158,19 @@ class TestElementListField(serializers.ListField):
         raise ValidationError(errors)
 
     def to_representation(self, data):
+        if isinstance(data, list):
+            return self.stored_to_representation(data)
         return [self.representation_serializer.to_representation(item) for item in data.all()]
 
+    def stored_to_representation(self, data):
+        # already rendered content, only pictures are converted to urls
+        fields = [(name, field) for name, field in self.representation_serializer.fields.items()
+                  if hasattr(field, 'stored_to_representation')]
+        if not fields:
+            return data
+        return [dict(item, **{name: field.stored_to_representation(item[name]) for name, field in fields})
+                for item in data]
+
 
 class AnswerSerializer(serializers.ModelSerializer):
     varId = serializers.IntegerField(source='answer_id', required=True, allow_null=False)
@@ -134,12 +201,13 @@ class QuestionSerializer(serializers.ModelSerializer):
     qId = serializers.IntegerField(source='question_id', required=True, allow_null=False)
     qText = serializers.CharField(source='text', max_length=255, allow_blank=True, required=False)
     qPic = PictureField(source='picture', allow_null=True, default=None, required=False)
+    qPicVariants = PictureVariantsField(source='picture')
 
     vars = TestElementListField(AnswerSerializer, 'varId', 'answer_id', 'question', True, source='answers')
 
     class Meta:
         model = Question
-        fields = ['qId', 'qText', 'qPic', 'vars']
+        fields = ['qId', 'qText', 'qPic', 'qPicVariants', 'vars']
 
 
 class ResultSerializer(serializers.ModelSerializer):
@@ -147,10 +215,44 @@ class ResultSerializer(serializers.ModelSerializer):
     resText = serializers.CharField(source='text', max_length=255)
     resDesc = serializers.CharField(source='description', max_length=255, allow_blank=True, required=False)
     resPic = PictureField(source='picture', allow_null=True, default=None, required=False)
+    resPicVariants = PictureVariantsField(source='picture')
 
     class Meta:
         model = Result
-        fields = ['resId', 'resText', 'resDesc', 'resPic']
+        fields = ['resId', 'resText', 'resDesc', 'resPic', 'resPicVariants']
+
+
+def get_passed_tests_ids(user, tests_ids):
+    return set(TestPass.objects.filter(user=user, test_id__in=tests_ids).values_list('test_id', flat=True))
+
+
+def overlay_passed(items, user):
+    """Sets `passed` flags of already serialized tests for the user"""
+    if not isinstance(user, VKUser):
+        for item in items:
+            item.pop('passed', None)
+        return
+
+    passed_ids = get_passed_tests_ids(user, [item['id'] for item in items])
+    for item in items:
+        item['passed'] = item['id'] in passed_ids
+
+
+class PassedListSerializer(serializers.ListSerializer):
+    """Fetches `passed` flags for the whole list with one query"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.passed_ids = None
+
+    def to_representation(self, data):
+        iterable = list(data.all() if isinstance(data, models.Manager) else data)
+
+        user = self.context['request'].user
+        if isinstance(user, VKUser):
+            self.passed_ids = get_passed_tests_ids(user, [item.pk for item in iterable])
+
+        return [self.child.to_representation(item) for item in iterable]
 
 
 class PassedMixin:
@@ -159,7 +261,11 @@ class PassedMixin:
 
         user = self.context['request'].user
         if isinstance(user, VKUser):
-            data['passed'] = TestPass.objects.filter(test_id=data['id'], user=user).exists()
+            passed_ids = getattr(self.parent, 'passed_ids', None)
+            if passed_ids is not None:
+                data['passed'] = instance.pk in passed_ids
+            else:
+                data['passed'] = TestPass.objects.filter(test_id=data['id'], user=user).exists()
 
         return data
 
@@ -169,6 +275,7 @@ class TestSerializer(PassedMixin, serializers.ModelSerializer,):
     passedCount = serializers.IntegerField(source='passed_count', default=0, read_only=True)
 
     picture = PictureField(allow_null=True, default=None, required=False)
+    pictureVariants = PictureVariantsField(source='picture')
     # results = ResultListField()
     results = TestElementListField(ResultSerializer, 'resId', 'result_id', 'test')
     # questions = QuestionListField()
@@ -176,13 +283,16 @@ class TestSerializer(PassedMixin, serializers.ModelSerializer,):
 
     class Meta:
         model = Test
-        fields = ['id', 'title', 'description', 'picture', 'isPublished', 'vip', 'price', 'gender', 'results',
-                  'questions', 'user', 'passedCount']
+        fields = ['id', 'title', 'description', 'picture', 'pictureVariants', 'isPublished', 'vip', 'price', 'gender',
+                  'results', 'questions', 'user', 'passedCount']
         read_only_fields = ['id', 'user', 'passedCount']
+        list_serializer_class = PassedListSerializer
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.results_ids = []
+        # filled by TestElementListField while validating and reused by save
+        self.existing_children = {}
 
     def to_internal_value(self, data):
         if 'results' in data:
@@ -214,37 +324,33 @@ class TestSerializer(PassedMixin, serializers.ModelSerializer,):
         results = self.validated_data.pop('results', [])
         questions = self.validated_data.pop('questions', [])
 
-        test = super().save(**kwargs)
-
-        # manage results
-        results_ids = [result.validated_data['result_id'] for result in results]
-        Result.objects.filter(~Q(id__in=results_ids), test=test).delete()
-        results_objects = {}
-        for result in results:
-            result.validated_data['test'] = test
-            result_obj = result.save()
-            results_objects[result_obj.result_id] = result_obj
-
-        # manage questions
-        questions_ids = [question.validated_data['question_id'] for question in questions]
-        Question.objects.filter(~Q(id__in=questions_ids), test=test).delete()
-        questions_objects = {}
-        for question in questions:
-            question.validated_data['test'] = test
-            answers = question.validated_data.pop('answers', [])
-            question_obj = question.save()
-            questions_objects[question_obj.question_id] = question_obj, answers
-
-        # manage answers
-        for question, answers in questions_objects.values():
-            answer_ids = [answer.validated_data['answer_id'] for answer in answers]
-            Answer.objects.filter(~Q(id__in=answer_ids), question=question).delete()
-            for answer in answers:
-                answer.validated_data['question'] = question
-                if 'res' in answer.validated_data:
-                    result_id = answer.validated_data.pop('res')
-                    answer.validated_data['result'] = results_objects[result_id] if result_id is not None else None
-                answer.save()
+        with transaction.atomic():
+            if self.instance is None:
+                test = super().save(**kwargs)
+                save_test_content(test, results, questions, {}, {}, {})
+
+                test.content = render_test_content(test)
+                Test.objects.filter(pk=test.pk).update(content=test.content)
+            else:
+                # children are saved first, so the content is stored by the test's update
+                existing = self.existing_children
+                picture = self.instance.picture.name
+                _, _, released = save_test_content(
+                    self.instance, results, questions,
+                    {key[1]: obj for key, obj in existing['results'].items()} if 'results' in existing else None,
+                    {key[1]: obj for key, obj in existing['questions'].items()} if 'questions' in existing else None,
+                    existing.get('vars')
+                )
+
+                set_rendered_content(self.instance, render_test_content(self.instance))
+                test = super().save(**kwargs)
+                if picture != test.picture.name:
+                    released.append(picture)
+                pictures_collector.schedule(released)
+
+            # children are prefetched by render_test_content
+            pictures = [test.picture] + [obj.picture for obj in [*test.results.all(), *test.questions.all()]]
+            derivatives.schedule([picture.name for picture in pictures], test.pk)
 
         return test
 
@@ -253,9 +359,42 @@ class TestShortSerializer(PassedMixin, serializers.ModelSerializer):
     isPublished = serializers.BooleanField(source='published', default=False)
     passedCount = serializers.IntegerField(source='passed_count', read_only=True)
     picture = PictureField(allow_null=True, default=None, required=False)
+    pictureVariants = PictureVariantsField(source='picture')
 
     class Meta:
         model = Test
-        fields = ['id', 'title', 'description', 'picture', 'isPublished', 'vip', 'price', 'gender', 'user',
-                  'passedCount']
+        fields = ['id', 'title', 'description', 'picture', 'pictureVariants', 'isPublished', 'vip', 'price', 'gender',
+                  'user', 'passedCount']
         read_only_fields = ['id', 'user', 'passedCount']
+        list_serializer_class = PassedListSerializer
+
+
+def render_test_content(test) -> str:
+    """Test.content rendered from the normalized tables"""
+    # children may be changed after they were prefetched
+    test._prefetched_objects_cache = {}
+    prefetch_related_objects([test], *get_content_lookups())
+
+    fields = TestSerializer(context={'stored': True}).fields
+    return json.dumps({name: fields[name].to_representation(getattr(test, fields[name].source))
+                       for name in CONTENT_FIELDS})
+
+
+def load_test_content(test):
+    """Renders and stores Test.content of the test which doesn't have it, e.g. after a save outside the api"""
+    if test.content is None:
+        set_rendered_content(test, render_test_content(test))
+        # content of the changed test is not stored
+        Test.objects.filter(pk=test.pk, modification_date=test.modification_date).update(content=test.content)
+
+
+class PictureUploadSerializer(serializers.ModelSerializer):
+    file = PictureField()
+    handle = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PictureUpload
+        fields = ['id', 'file', 'handle']
+
+    def get_handle(self, obj):
+        return f'{PictureField.handle_prefix}{obj.pk}'
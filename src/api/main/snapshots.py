@@ -0,0 +1,60 @@
+import hashlib
+import json
+
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from hypertest.main.models import Test
+from hypertest.main.signals import derivatives_ready
+
+from api.main.cache import catalog_cache
+from api.main.serializers import TestSerializer, load_test_content, render_test_content
+
+# fields which change after publishing, they are set on every response
+OVERLAY_FIELDS = ['passedCount', 'passed']
+
+
+def render_snapshot(test, context) -> str:
+    load_test_content(test)
+    data = TestSerializer(test, context=context).data
+    for name in OVERLAY_FIELDS:
+        data.pop(name, None)
+    return json.dumps(data)
+
+
+def get_snapshot(test, context) -> str:
+    """Detail of the published test without overlay fields, it is rendered and stored on the first request"""
+    if test.snapshot is None:
+        test.snapshot = render_snapshot(test, context)
+        # snapshot of the changed test is not stored
+        Test.objects.filter(pk=test.pk, modification_date=test.modification_date).update(snapshot=test.snapshot)
+    return test.snapshot
+
+
+def get_snapshot_etag(test, passed) -> str:
+    # snapshots are also reset by updates which don't change the modification date
+    value = f'{hashlib.md5(test.snapshot.encode()).hexdigest()}:{test.passed_count}:{passed}'
+    return '"' + hashlib.md5(value.encode()).hexdigest() + '"'
+
+
+@receiver(pre_save, sender=Test)
+def reset_snapshot(sender, instance, update_fields=None, **kwargs):
+    # passes are saved with update_fields, other changes render the snapshot again
+    if update_fields is None:
+        instance.snapshot = None
+        # children may be changed directly before saves outside the api
+        if instance.content is not instance.__dict__.pop('_rendered_content', None):
+            instance.content = None
+
+
+@receiver(derivatives_ready)
+def update_pictures_variants(sender, test_id=None, **kwargs):
+    # variants are stored in the content and the snapshot and cached in the catalog
+    test = Test.objects.filter(pk=test_id).first() if test_id is not None else None
+    if test is None:
+        return
+
+    content = render_test_content(test) if test.content is not None else None
+    Test.objects.filter(pk=test.pk, modification_date=test.modification_date).update(content=content, snapshot=None)
+    if test.published:
+        catalog_cache.invalidate()
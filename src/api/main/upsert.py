@@ -0,0 +1,150 @@
+from django.db import connection
+from django.db.models import FileField
+
+from hypertest.main.models import Result, Question, Answer
+
+
+def assign_changes(obj, data) -> list:
+    """Sets only changed values of `data` to `obj` and returns names of changed fields"""
+    changed = []
+
+    for name, value in data.items():
+        field = obj._meta.get_field(name)
+        current = getattr(obj, field.attname)
+
+        if isinstance(field, FileField):
+            # new files are always uploaded, otherwise compare stored names
+            if value is None or isinstance(value, str):
+                is_changed = (current.name or None) != (value or None)
+            else:
+                is_changed = True
+        elif field.is_relation:
+            is_changed = current != (value.pk if value is not None else None)
+        else:
+            is_changed = current != value
+
+        if is_changed:
+            setattr(obj, name, value)
+            changed.append(name)
+
+    return changed
+
+
+def get_file_names(obj) -> list:
+    return [getattr(obj, field.attname).name for field in obj._meta.fields if isinstance(field, FileField)]
+
+
+class ChildrenDiff:
+    """Inserts, updates and deletes of one level of test children keyed by (parent, client-side id)"""
+
+    def __init__(self, model):
+        self.model = model
+
+        self.objects = {}
+        self.to_create = []
+        self.to_update = []
+        self.update_fields = set()
+        self.to_delete = []
+        # names of files which are not referenced by the children anymore
+        self.released = []
+
+    def compute(self, existing: dict, items):
+        for key, data in items:
+            obj = existing.get(key)
+            if obj is None:
+                obj = self.model(**data)
+                self.to_create.append(obj)
+            else:
+                file_names = get_file_names(obj)
+                changed = assign_changes(obj, data)
+                if changed:
+                    self.to_update.append(obj)
+                    self.update_fields.update(changed)
+                    self.released += [name for name in file_names if name not in get_file_names(obj)]
+            self.objects[key] = obj
+
+        deleted = [obj for key, obj in existing.items() if key not in self.objects]
+        self.to_delete = [obj.pk for obj in deleted]
+        for obj in deleted:
+            self.released += get_file_names(obj)
+        return self
+
+    def apply(self, refetch_filter=None):
+        if self.to_delete:
+            self.model.objects.filter(pk__in=self.to_delete).delete()
+
+        if self.to_create:
+            self.model.objects.bulk_create(self.to_create)
+            # sqlite does not return primary keys from bulk insert
+            if refetch_filter is not None and not connection.features.can_return_rows_from_bulk_insert:
+                self.refetch_created(refetch_filter)
+
+        if self.to_update:
+            fields = [self.model._meta.get_field(name) for name in self.update_fields]
+            for obj in self.to_update:
+                # bulk_update does not call pre_save so new files have to be committed here
+                for field in fields:
+                    if isinstance(field, FileField):
+                        field.pre_save(obj, False)
+            self.model.objects.bulk_update(self.to_update, list(self.update_fields))
+
+        return self.objects
+
+    def refetch_created(self, refetch_filter):
+        key_field, lookup = refetch_filter
+        created = {getattr(obj, key_field): obj for obj in self.to_create}
+        queryset = self.model.objects.filter(**lookup, **{key_field + '__in': list(created)})
+        for key, pk in queryset.values_list(key_field, 'pk'):
+            created[key].pk = pk
+
+
+def save_test_content(test, results, questions, existing_results=None, existing_questions=None,
+                      existing_answers=None):
+    """
+    Synchronizes test's results, questions and answers with validated data using a fixed number of queries.
+
+    `existing_*` are maps of current children keyed the same way as the diff, they are loaded if not provided:
+    results by `result_id`, questions by `question_id` and answers by (`question.pk`, `answer_id`).
+    Returns saved results and questions by their ids and names of files which are not referenced by them anymore.
+    """
+    # results
+    if existing_results is None:
+        existing_results = {obj.result_id: obj for obj in Result.objects.filter(test=test)}
+
+    items = [(data['result_id'], dict(data, test=test)) for data in results]
+    results_diff = ChildrenDiff(Result).compute(existing_results, items)
+    results_objects = results_diff.apply(('result_id', {'test': test}))
+
+    # questions
+    if existing_questions is None:
+        existing_questions = {obj.question_id: obj for obj in Question.objects.filter(test=test)}
+
+    items = []
+    answers = {}
+    for data in questions:
+        data = dict(data, test=test)
+        answers[data['question_id']] = data.pop('answers', [])
+        items.append((data['question_id'], data))
+    diff = ChildrenDiff(Question).compute(existing_questions, items)
+    questions_objects = diff.apply(('question_id', {'test': test}))
+
+    # answers of deleted questions are deleted by cascade
+    if existing_answers is None:
+        queryset = Answer.objects.filter(question__test=test).exclude(question_id__in=diff.to_delete)
+        existing_answers = {(obj.question_id, obj.answer_id): obj for obj in queryset}
+    elif diff.to_delete:
+        deleted = set(diff.to_delete)
+        existing_answers = {key: obj for key, obj in existing_answers.items() if key[0] not in deleted}
+
+    items = []
+    for question_id, question_answers in answers.items():
+        question = questions_objects[question_id]
+        for data in question_answers:
+            data = dict(data, question=question)
+            if 'res' in data:
+                result_id = data.pop('res')
+                data['result'] = results_objects[result_id] if result_id is not None else None
+            items.append(((question.pk, data['answer_id']), data))
+    ChildrenDiff(Answer).compute(existing_answers, items).apply()
+
+    return results_objects, questions_objects, results_diff.released + diff.released
@@ -0,0 +1,168 @@
+"""
+Fast path for validation of test elements lists.
+
+Child serializers of `TestElementListField` are compiled once per class into plain functions which replicate DRF's
+validation of the common values (integers, strings, nested lists) and delegate everything else to the bound fields.
+The fast path never builds error details: if anything is wrong with the payload it raises `Invalid` and the field
+falls back to the regular per-item serializers, so error responses stay exactly the same.
+"""
+from collections.abc import Mapping
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import MaxLengthValidator, MinLengthValidator, ProhibitNullCharactersValidator
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import SkipField, empty
+from rest_framework.utils import html
+
+
+class Invalid(Exception):
+    pass
+
+
+def compile_delegate(name):
+    def run(value, serializer):
+        try:
+            return serializer.fields[name].run_validation(value)
+        except (ValidationError, DjangoValidationError):
+            raise Invalid
+
+    return run
+
+
+def compile_integer(name, field):
+    delegate = compile_delegate(name)
+
+    def run(value, serializer):
+        if type(value) is int:
+            return value
+        return delegate(value, serializer)
+
+    return run
+
+
+def compile_char(name, field):
+    delegate = compile_delegate(name)
+    allow_blank, trim_whitespace = field.allow_blank, field.trim_whitespace
+    max_length, min_length = field.max_length, field.min_length
+
+    def run(value, serializer):
+        if type(value) is not str:
+            return delegate(value, serializer)
+
+        if trim_whitespace:
+            value = value.strip()
+        if value == '':
+            if not allow_blank:
+                raise Invalid
+            return ''
+
+        if max_length is not None and len(value) > max_length or \
+                min_length is not None and len(value) < min_length or '\x00' in value:
+            raise Invalid
+        return value
+
+    return run
+
+
+def compile_list(name, field):
+    def run(value, serializer):
+        if type(value) is not list:
+            raise Invalid
+        return serializer.fields[name].run_fast_validation(value)
+
+    return run
+
+
+def compile_value(name, field):
+    field_type = type(field)
+
+    if field_type is serializers.IntegerField and not field.validators:
+        return compile_integer(name, field)
+
+    char_validators = (MaxLengthValidator, MinLengthValidator, ProhibitNullCharactersValidator)
+    if field_type is serializers.CharField and all(isinstance(v, char_validators) for v in field.validators):
+        return compile_char(name, field)
+
+    if hasattr(field, 'run_fast_validation') and not field.validators and field.allow_empty:
+        return compile_list(name, field)
+
+    return compile_delegate(name)
+
+
+def compile_field(name, field):
+    required, default, allow_null = field.required, field.default, field.allow_null
+    to_internal_value = compile_value(name, field)
+
+    def run(data, serializer):
+        value = data.get(name, empty)
+
+        if value is empty:
+            if required:
+                raise Invalid
+            if default is empty:
+                raise SkipField
+            return default
+
+        if value is None:
+            if not allow_null:
+                raise Invalid
+            return None
+
+        return to_internal_value(value, serializer)
+
+    return run
+
+
+class CompiledSerializer:
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+
+        self.steps = []
+        for field in serializer._writable_fields:
+            if len(field.source_attrs) != 1 or field.default is not empty and callable(field.default):
+                raise TypeError(f'Field {field.field_name} cannot be compiled')
+
+            validate_method_name = 'validate_' + field.field_name
+            if not hasattr(serializer, validate_method_name):
+                validate_method_name = None
+
+            self.steps.append((field.source, compile_field(field.field_name, field), validate_method_name))
+
+        if serializer.validators or serializer_class.validate is not serializers.Serializer.validate:
+            raise TypeError(f'{serializer_class.__name__} has object level validation')
+
+    def validate(self, data, serializer):
+        """Validates one item, `serializer` is a bound instance which provides fields and validate methods"""
+        if not isinstance(data, Mapping) or html.is_html_input(data):
+            raise Invalid
+
+        validated_data = {}
+        for source, run, validate_method_name in self.steps:
+            try:
+                value = run(data, serializer)
+            except SkipField:
+                continue
+
+            if validate_method_name is not None:
+                try:
+                    value = getattr(serializer, validate_method_name)(value)
+                except (ValidationError, DjangoValidationError):
+                    raise Invalid
+
+            validated_data[source] = value
+
+        return validated_data
+
+
+compiled_serializers = {}
+
+
+def get_compiled_serializer(serializer_class) -> CompiledSerializer or None:
+    if serializer_class not in compiled_serializers:
+        try:
+            compiled_serializers[serializer_class] = CompiledSerializer(serializer_class)
+        except TypeError:
+            compiled_serializers[serializer_class] = None
+
+    return compiled_serializers[serializer_class]
@@ -1,16 +1,36 @@
+import json
+
 from django.db import transaction
-from django.db.models import Q, Exists, F, OuterRef, Subquery
+from django.db.models import Q, Exists, F, OuterRef
+from django.utils.http import http_date, parse_etags
 
+from rest_framework import status
 from rest_framework.exceptions import NotFound
+from rest_framework.generics import CreateAPIView
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.views import APIView
 
 from django_filters.rest_framework import FilterSet, BooleanFilter, CharFilter
 
-from hypertest.main.models import Test, TestPass
-
-from api.main.serializers import TestSerializer, TestShortSerializer
+from hypertest.main.counters import get_passed_counter
+from hypertest.main.indexes import NullsLast
+from hypertest.main.bitmaps import get_passed_bitmap
+from hypertest.main.collector import pictures_collector
+from hypertest.main.derivatives import derivatives
+from hypertest.main.models import Test, TestPass, Result, Question
+from hypertest.main.search import search_tests
+from hypertest.main.suggestions import title_suggestions
+from hypertest.user.models import VKUser
+
+from api.counts import PUBLISHED_TESTS_COUNT_KEY
+from api.main.cache import catalog_cache
+from api.main.serializers import TestSerializer, TestShortSerializer, PictureUploadSerializer, \
+    get_passed_tests_ids, load_test_content, overlay_passed
+from api.main.snapshots import get_snapshot, get_snapshot_etag
+from api.pagination import Pagination
+from api.parsers import ImageUploadParser, StreamingJSONParser
 from api.permissions import UpdateTestPermission
 
 
@@ -18,11 +38,26 @@ class TestFilter(FilterSet):
     isPublished = BooleanFilter('published')
     passed = BooleanFilter(method='filter_passed')
     gender = CharFilter(method='filter_gender')
+    q = CharFilter(method='filter_search')
+
+    @classmethod
+    def excludes_passed_in_memory(cls, request) -> bool:
+        """Cursor pages of tests not passed by the user are filtered with the user's bitmap by the pagination"""
+        return isinstance(request.user, VKUser) and Pagination.cursor_query_param in request.query_params and \
+            cls.base_filters['passed'].field.clean(request.query_params.get('passed')) is False
 
     def filter_passed(self, queryset, name, value):
-        subquery = Exists(TestPass.objects.filter(test=OuterRef('pk')), negated=not value)
+        user = self.request.user
+        if not isinstance(user, VKUser) or self.excludes_passed_in_memory(self.request):
+            return queryset
+
+        # semi-join or anti-join probing (user, test) index for every test of the page
+        subquery = Exists(TestPass.objects.filter(user=user, test=OuterRef('pk')), negated=not value)
         return queryset.filter(subquery)
 
+    def filter_search(self, queryset, name, value):
+        return search_tests(queryset, value)
+
     def filter_gender(self, queryset, name, value):
         if value == '2':  # male
             return queryset.filter(Q(gender=0) | Q(gender=1))
@@ -31,27 +66,107 @@ class TestFilter(FilterSet):
         return queryset
 
 
-class TestView(ModelViewSet):
-    filterset_class = TestFilter
-    queryset = Test.objects.filter(published=True).order_by(F('publish_date').desc(nulls_last=True), '-id')
+class TestViewMixin:
+    prefetch_detail = True
+    list_actions = ['list']
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action in self.list_actions:
+            queryset = queryset.defer('content', 'snapshot', 'search_vector')
+        return queryset
+
+    def get_object(self):
+        test = super().get_object()
+        # detail is read from the materialized content, it is rendered and stored when it is missing
+        if self.action == 'retrieve' and self.prefetch_detail:
+            load_test_content(test)
+        return test
+
+    def get_cursor_fields(self, queryset):
+        # search results are ordered by their rank, queries without words are not annotated with it
+        if 'search_rank' in queryset.query.annotations:
+            return ['-search_rank', '-id']
+        return self.cursor_fields
+
+    def get_excluded_ids(self, request):
+        filterset_class = getattr(self, 'filterset_class', None)
+        if filterset_class is not None and filterset_class.excludes_passed_in_memory(request):
+            return get_passed_bitmap(request.user.pk)
+        return None
 
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.action in self.list_actions:
             return TestShortSerializer
         return TestSerializer
 
 
-class MyTestsView(ModelViewSet):
+class TestView(TestViewMixin, ModelViewSet):
+    filterset_class = TestFilter
+    queryset = Test.objects.filter(published=True).order_by(NullsLast(F('publish_date'), descending=True), '-id')
+    cursor_fields = ['-publish_date', '-id']
+    maintained_count_key = PUBLISHED_TESTS_COUNT_KEY
+    # detail is served from the snapshot which is rendered once
+    prefetch_detail = False
+
+    def list(self, request, *args, **kwargs):
+        key = catalog_cache.get_key(request, self)
+        if key is None:
+            return super().list(request, *args, **kwargs)
+
+        data = catalog_cache.get(key)
+        if data is None:
+            response = super().list(request, *args, **kwargs)
+            catalog_cache.set(key, response.data)
+            return response
+
+        overlay_passed(data['items'], request.user)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        test = self.get_object()
+
+        passed = None
+        if isinstance(request.user, VKUser):
+            passed = test.pk in get_passed_tests_ids(request.user, [test.pk])
+
+        snapshot = get_snapshot(test, self.get_serializer_context())
+        headers = {
+            'ETag': get_snapshot_etag(test, passed),
+            'Last-Modified': http_date(test.modification_date.timestamp()),
+        }
+        if headers['ETag'] in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data = json.loads(snapshot)
+        data['passedCount'] = test.passed_count
+        if passed is not None:
+            data['passed'] = passed
+        return Response(data, headers=headers)
+
+
+class MyTestsView(TestViewMixin, ModelViewSet):
     filterset_class = TestFilter
     permission_classes = ModelViewSet.permission_classes + [UpdateTestPermission]
+    # base64 pictures are decoded to temporary files while the request is read
+    parser_classes = [StreamingJSONParser, FormParser, MultiPartParser]
+    cursor_fields = ['-creation_date', '-id']
 
     def get_queryset(self):
         return Test.objects.filter(user=self.request.user).order_by('-creation_date', '-id')
 
-    def get_serializer_class(self):
-        if self.action == 'list':
-            return TestShortSerializer
-        return TestSerializer
+    def perform_update(self, serializer):
+        test = serializer.save()
+        if test.published:
+            get_snapshot(test, self.get_serializer_context())
+
+    def perform_destroy(self, instance):
+        pictures = [instance.picture.name]
+        for model in [Result, Question]:
+            pictures += model.objects.filter(test=instance).values_list('picture', flat=True)
+
+        super().perform_destroy(instance)
+        pictures_collector.schedule(pictures)
 
 
 class TestPassView(APIView):
@@ -62,32 +177,40 @@ class TestPassView(APIView):
         except Test.DoesNotExist:
             raise NotFound
 
-        defaults = {
-            'user': self.request.user,
-            'test': test
-        }
         with transaction.atomic():
-            test_pass, created = TestPass.objects.get_or_create(defaults, user=self.request.user, test=test)
-            if created:
-                test.passed_count += 1
-                test.save()
-            else:
-                test_pass.save()
+            if TestPass.objects.record(test, self.request.user):
+                get_passed_counter().increment(test)
 
         return Response()
 
 
-class PassedTestsView(ModelViewSet):
-    pagination_class = None
+class TestSuggestView(APIView):
+    """Titles of published tests starting with `q`, served from the in-process index without database queries"""
 
-    def get_queryset(self):
-        subquery = TestPass.objects.filter(test_id=OuterRef('pk'), user=self.request.user)
-        return Test.objects.annotate(pass_date=Subquery(subquery.values('date'))).filter(pass_date__isnull=False).order_by('-pass_date', '-id')
+    default_limit = 10
+    max_limit = 20
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+
+        suggestions = title_suggestions.suggest(request.query_params.get('q', ''), limit)
+        return Response({'items': [{'id': test_id, 'title': title} for test_id, title in suggestions]})
 
-    def get_serializer_class(self):
-        if self.action == 'list':
-            return TestShortSerializer
-        return TestSerializer
+
+class PassedTestsView(TestViewMixin, ModelViewSet):
+    """Tests passed by the user, the last passed first"""
+
+    list_actions = ['list', 'history']
+    cursor_fields = ['-pass_date', '-pass_id']
+
+    def get_queryset(self):
+        # driven by the user's passes, the passed tests are joined to them
+        queryset = Test.objects.filter(passes__user=self.request.user)
+        queryset = queryset.annotate(pass_date=F('passes__date'), pass_id=F('passes__id'))
+        return queryset.order_by('-pass_date', '-pass_id')
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
@@ -95,6 +218,20 @@ class PassedTestsView(ModelViewSet):
         serializer = self.get_serializer(queryset[:6], many=True)
         return Response({'items': serializer.data})
 
+    def history(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+
+class PictureUploadView(CreateAPIView):
+    """Uploads a picture as raw image/* body or multipart `file`, the returned handle is accepted by pictures fields"""
+
+    parser_classes = [ImageUploadParser, MultiPartParser]
+    serializer_class = PictureUploadSerializer
+
+    def perform_create(self, serializer):
+        upload = serializer.save(user=self.request.user)
+        derivatives.schedule([upload.file.name])
+
 
 test_list_view = TestView.as_view({'get': 'list'})
 test_detail_view = TestView.as_view({'get': 'retrieve'})
@@ -104,3 +241,4 @@ my_tests_detail_view = MyTestsView.as_view({'get': 'retrieve', 'put': 'update',
 
 passed_tests_list_view = PassedTestsView.as_view({'get': 'list'})
 passed_tests_detail_view = PassedTestsView.as_view({'get': 'retrieve'})
+passed_tests_history_view = PassedTestsView.as_view({'get': 'history'})
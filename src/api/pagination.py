@@ -1,20 +1,304 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from functools import partial
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator as DjangoPaginator
+from django.db.models import BooleanField, F, Q
+from django.db.models.expressions import Col, Expression
+from django.db.models.sql.constants import LOUTER
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
+from api.counts import count_provider
+from hypertest.main.indexes import NullsLast
+
+
+def encode_cursor(values) -> str:
+    # keep microseconds of datetimes to compare them exactly
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeError, ValueError):
+        raise NotFound('Invalid cursor')
+
+    if not isinstance(values, list):
+        raise NotFound('Invalid cursor')
+    return values
+
+
+def get_ordering_field(queryset, name):
+    if name in queryset.query.annotations:
+        return queryset.query.annotations[name].output_field
+    return queryset.model._meta.get_field(name)
+
+
+def is_nullable(queryset, name):
+    annotation = queryset.query.annotations.get(name)
+    if annotation is None:
+        return get_ordering_field(queryset, name).null
+
+    # columns of inner joined tables are NULL only if their fields are, other annotations may be NULL regardless
+    # of their output field
+    if isinstance(annotation, Col):
+        join = queryset.query.alias_map.get(annotation.alias)
+        if join is not None and getattr(join, 'join_type', None) != LOUTER:
+            return annotation.target.null
+    return True
+
+
+class RowComparison(Expression):
+    """`(a, b) < (x, y)` condition, unlike the equivalent OR of comparisons it is a range of an index on (a, b)"""
+
+    output_field = BooleanField()
+
+    def __init__(self, names, values, descending):
+        super().__init__()
+        self.expressions = [F(name) for name in names]
+        self.values = values
+        self.descending = descending
+
+    def get_source_expressions(self):
+        return self.expressions
+
+    def set_source_expressions(self, exprs):
+        self.expressions = exprs
+
+    def resolve_expression(self, query=None, allow_joins=True, reuse=None, summarize=False, for_save=False):
+        c = self.copy()
+        c.is_summary = summarize
+        c.expressions = [expr.resolve_expression(query, allow_joins, reuse, summarize, for_save)
+                         for expr in self.expressions]
+        return c
+
+    def as_sql(self, compiler, connection):
+        columns, params = [], []
+        for expr in self.expressions:
+            sql, expr_params = compiler.compile(expr)
+            columns.append(sql)
+            params += expr_params
+        params += [expr.output_field.get_db_prep_value(value, connection)
+                   for expr, value in zip(self.expressions, self.values)]
+
+        operator = '<' if self.descending else '>'
+        return f'({", ".join(columns)}) {operator} ({", ".join(["%s"] * len(self.values))})', params
+
+
+def keyset_ordering(cursor_fields, nullable):
+    """Ordering of `cursor_fields` ('-field' is descending), NULL values of `nullable` fields are last"""
+    ordering = []
+    for field in cursor_fields:
+        name = field.lstrip('-')
+        # plain ordering of not null fields keeps it servable by indexes
+        if name in nullable:
+            ordering.append(NullsLast(F(name), descending=field.startswith('-')))
+        elif field.startswith('-'):
+            ordering.append(F(name).desc())
+        else:
+            ordering.append(F(name).asc())
+    return ordering
+
+
+def keyset_filter(cursor_fields, values, nullable) -> Q:
+    """Condition of rows going after the position `values` in `keyset_ordering(cursor_fields, nullable)`"""
+    field, values = cursor_fields[0], list(values)
+    value = values.pop(0)
+    name = field.lstrip('-')
+
+    if value is None:
+        # NULL values are last, only next fields may go after
+        if not values:
+            return Q(pk__in=[])
+        return Q(**{name + '__isnull': True}) & keyset_filter(cursor_fields[1:], values, nullable)
+
+    lookup = '__lt' if field.startswith('-') else '__gt'
+    condition = Q(**{name + lookup: value})
+    if name in nullable:
+        condition |= Q(**{name + '__isnull': True})
+    if values:
+        condition |= Q(**{name: value}) & keyset_filter(cursor_fields[1:], values, nullable)
+    return condition
+
+
+def keyset_ranges(cursor_fields, values, nullable) -> list:
+    """
+    Rows going after the position `values` in `keyset_ordering(cursor_fields, nullable)` as a list of ranges.
+
+    Every range is a list of conditions which an index of the ordering seeks to, rows of a range go after rows of
+    the previous one. NULL values of the first field are the last range.
+    """
+    names = [field.lstrip('-') for field in cursor_fields]
+    if values[0] is None:
+        # NULL values are last, only next fields may go after
+        if len(values) == 1:
+            return []
+        return [[Q(**{names[0] + '__isnull': True})] + conditions
+                for conditions in keyset_ranges(cursor_fields[1:], values[1:], nullable)]
+
+    directions = {field.startswith('-') for field in cursor_fields}
+    if len(directions) > 1 or None in values or nullable & set(names[1:]):
+        # rows can't be compared when directions are mixed or next fields may be NULL
+        return [[keyset_filter(cursor_fields, values, nullable)]]
+
+    if len(names) == 1:
+        condition = Q(**{names[0] + ('__lt' if cursor_fields[0].startswith('-') else '__gt'): values[0]})
+    else:
+        condition = RowComparison(names, values, cursor_fields[0].startswith('-'))
+    ranges = [[condition]]
+    if names[0] in nullable:
+        ranges.append([Q(**{names[0] + '__isnull': True})])
+    return ranges
+
+
+class Paginator(DjangoPaginator):
+    def __init__(self, object_list, per_page, counter=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.counter = counter
+        self.count_exact = True
+
+    @cached_property
+    def count(self):
+        if self.counter is None:
+            return super().count
+        count, self.count_exact = self.counter(self.object_list)
+        return count
+
+    def validate_number(self, number):
+        # counts may be cached or estimated, so pages are not limited by them
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = self.object_list[bottom:bottom + self.per_page]
+        if number > 1 and not object_list:
+            raise EmptyPage('That page contains no results')
+        return self._get_page(object_list, number, self)
+
 
 class Pagination(PageNumberPagination):
+    """
+    Page number pagination, views with `cursor_fields` also support keyset pagination with ?cursor=
+
+    Cursor pages don't count total items and cost the same regardless of the position, the first page is
+    requested with an empty cursor. Every page returns `next_cursor` to continue from. Views may exclude rows
+    of cursor pages in memory with `get_excluded_ids(request)` returning a container of excluded primary keys and
+    change `cursor_fields` of the filtered queryset with `get_cursor_fields(queryset)`.
+
+    Total counts of page number pagination are provided by `api.counts.count_provider`, `total_exact` is False
+    when the count is estimated.
+    """
+
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 40
 
+    cursor_query_param = 'cursor'
+    # rows read at once when rows excluded in memory are skipped
+    max_chunk_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.cursor_fields = view.get_cursor_fields(queryset) if hasattr(view, 'get_cursor_fields') else \
+            getattr(view, 'cursor_fields', None)
+        self.next_cursor = None
+
+        if self.cursor_fields and self.cursor_query_param in request.query_params:
+            return self.paginate_queryset_by_cursor(queryset, request, view)
+
+        self.cursor_page_size = None
+        self.django_paginator_class = partial(Paginator, counter=partial(count_provider.count, view=view,
+                                                                         request=request))
+        items = super().paginate_queryset(queryset, request, view)
+        if self.cursor_fields and items and self.page.has_next():
+            self.next_cursor = self.get_cursor(items[-1])
+        return items
+
+    def paginate_queryset_by_cursor(self, queryset, request, view=None):
+        self.cursor_page_size = self.get_page_size(request)
+        nullable = {field.lstrip('-') for field in self.cursor_fields if is_nullable(queryset, field.lstrip('-'))}
+        queryset = queryset.order_by(*keyset_ordering(self.cursor_fields, nullable))
+
+        values = None
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != len(self.cursor_fields):
+                raise NotFound('Invalid cursor')
+
+            try:
+                values = [get_ordering_field(queryset, field.lstrip('-')).to_python(value) if value is not None
+                          else None for field, value in zip(self.cursor_fields, values)]
+            except ValidationError:
+                raise NotFound('Invalid cursor')
+
+        excluded = view.get_excluded_ids(request) if hasattr(view, 'get_excluded_ids') else None
+        ranges = [[]] if values is None else keyset_ranges(self.cursor_fields, values, nullable)
+        chunk_size = self.cursor_page_size + 1
+
+        items = []
+        while ranges and len(items) <= self.cursor_page_size:
+            chunk = list(queryset.filter(*ranges[0])[:chunk_size])
+            items += [item for item in chunk if excluded is None or item.pk not in excluded]
+
+            if len(chunk) < chunk_size:
+                # the range is exhausted, the next one goes after it
+                ranges.pop(0)
+            elif excluded is not None:
+                # rows excluded by the view in memory are skipped with the following chunks
+                ranges = keyset_ranges(self.cursor_fields, self.get_cursor_values(chunk[-1]), nullable)
+                chunk_size = min(chunk_size * 2, self.max_chunk_size)
+
+        if len(items) > self.cursor_page_size:
+            items = items[:self.cursor_page_size]
+            self.next_cursor = self.get_cursor(items[-1])
+
+        return items
+
+    def get_cursor_values(self, item):
+        return [getattr(item, field.lstrip('-')) for field in self.cursor_fields]
+
+    def get_cursor(self, item):
+        return encode_cursor(self.get_cursor_values(item))
+
     def get_paginated_response(self, data):
+        if self.cursor_page_size is not None:
+            return Response({
+                '_metadata': {
+                    'page_size': self.cursor_page_size,
+                    'next_cursor': self.next_cursor,
+                    'max_page_size': self.max_page_size,
+                },
+                'items': data
+            })
+
+        metadata = {
+            'page': self.page.number,
+            'page_size': self.page.paginator.per_page,
+            'total_pages': self.page.paginator.num_pages,
+            'total_items': self.page.paginator.count,
+            'total_exact': self.page.paginator.count_exact,
+            'max_page_size': self.max_page_size,
+        }
+        if self.cursor_fields:
+            metadata['next_cursor'] = self.next_cursor
+
         return Response({
-            '_metadata': {
-                'page': self.page.number,
-                'page_size': self.page.paginator.per_page,
-                'total_pages': self.page.paginator.num_pages,
-                'total_items': self.page.paginator.count,
-                'max_page_size': self.max_page_size,
-            },
+            '_metadata': metadata,
             'items': data
         })
@@ -0,0 +1,284 @@
+import base64
+import binascii
+import itertools
+import json
+import re
+
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.utils.datastructures import MultiValueDict
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, FileUploadParser
+from rest_framework.renderers import JSONRenderer
+
+
+def close_with_request(parser_context, files):
+    """Files are closed when the request is finished, DRF does it only for form media types"""
+    request = (parser_context or {}).get('request')
+    if request is None:
+        return
+
+    request = request._request
+    if not hasattr(request, '_files'):
+        request._files = MultiValueDict()
+    for file in files:
+        request._files.appendlist('parsed', file)
+
+
+class ImageUploadParser(FileUploadParser):
+    """Raw image request body, it is streamed to disk by upload handlers. Content-Disposition is optional"""
+
+    media_type = 'image/*'
+
+    def get_filename(self, stream, media_type, parser_context):
+        filename = super().get_filename(stream, media_type, parser_context)
+        if not filename:
+            filename = 'upload.' + media_type.split(';')[0].split('/')[-1].strip()
+        return filename
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        data_and_files = super().parse(stream, media_type, parser_context)
+        close_with_request(parser_context, data_and_files.files.values())
+        return data_and_files
+
+
+def count_backslashes(data, start, end) -> int:
+    """Number of backslashes going right before `end`, not further than `start`"""
+    count = 0
+    while end - count > start and data[end - count - 1] == 0x5c:
+        count += 1
+    return count
+
+
+class JSONStreamDecoder:
+    """
+    Incremental JSON decoder of a binary stream.
+
+    Strings of `spooled_keys` which are base64 data URLs are decoded chunk by chunk into temporary files and returned
+    as uploaded files, other values are decoded with `json.loads`. Invalid base64 is returned as an invalid data URL.
+    """
+
+    chunk_size = 64 * 1024
+    header_max_length = 256
+    whitespace = b' \t\n\r'
+    delimiters = b',]}' + whitespace
+
+    data_url_re = re.compile(rb'data:([\w.+-]+)/([\w.+-]+);base64,')
+    not_base64_re = re.compile(rb'[^A-Za-z0-9+/=]')
+
+    def __init__(self, stream, spooled_keys):
+        self.stream = stream
+        self.spooled_keys = set(spooled_keys)
+        self.buffer = b''
+        self.pos = 0
+        self.files = []
+
+    def fill(self) -> bool:
+        """Appends the next chunk dropping consumed bytes, returns False at the end of the stream"""
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> bytes:
+        """Next not whitespace byte without consuming it, empty at the end of the stream"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self.whitespace:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos:self.pos + 1]
+            if not self.fill():
+                return b''
+
+    def decode(self):
+        value = self.parse_value()
+        if self.peek():
+            raise ValueError('Extra data')
+        return value
+
+    def parse_value(self, spooled=False):
+        char = self.peek()
+        if char == b'{':
+            return self.parse_object()
+        if char == b'[':
+            return self.parse_array()
+        if char == b'"':
+            return self.parse_spooled() if spooled else self.parse_string()
+        if not char:
+            raise ValueError('Expecting value')
+        return self.parse_literal()
+
+    def parse_object(self):
+        self.pos += 1
+        obj = {}
+        if self.peek() == b'}':
+            self.pos += 1
+            return obj
+
+        while True:
+            if self.peek() != b'"':
+                raise ValueError('Expecting property name enclosed in double quotes')
+            key = self.parse_string()
+            if self.peek() != b':':
+                raise ValueError("Expecting ':' delimiter")
+            self.pos += 1
+            obj[key] = self.parse_value(spooled=key in self.spooled_keys)
+
+            char = self.peek()
+            self.pos += 1
+            if char == b'}':
+                return obj
+            if char != b',':
+                raise ValueError("Expecting ',' delimiter")
+
+    def parse_array(self):
+        self.pos += 1
+        array = []
+        if self.peek() == b']':
+            self.pos += 1
+            return array
+
+        while True:
+            array.append(self.parse_value())
+
+            char = self.peek()
+            self.pos += 1
+            if char == b']':
+                return array
+            if char != b',':
+                raise ValueError("Expecting ',' delimiter")
+
+    def parse_literal(self):
+        end = self.pos
+        while True:
+            while end < len(self.buffer) and self.buffer[end] not in self.delimiters:
+                end += 1
+            if end < len(self.buffer):
+                break
+            offset = end - self.pos
+            if not self.fill():
+                break
+            end = self.pos + offset
+
+        token, self.pos = self.buffer[self.pos:end], end
+        return json.loads(token)
+
+    def iter_string(self):
+        """Yields raw chunks of the string content and consumes it with the closing quote"""
+        self.pos += 1
+        backslashes = 0
+
+        while True:
+            if self.pos >= len(self.buffer) and not self.fill():
+                raise ValueError('Unterminated string')
+
+            start = search = self.pos
+            while True:
+                quote = self.buffer.find(b'"', search)
+                if quote == -1:
+                    break
+
+                count = count_backslashes(self.buffer, start, quote)
+                if count == quote - start:
+                    count += backslashes
+                if count % 2 == 0:
+                    self.pos = quote + 1
+                    yield self.buffer[start:quote]
+                    return
+                search = quote + 1
+
+            chunk = self.buffer[start:]
+            count = count_backslashes(chunk, 0, len(chunk))
+            backslashes = backslashes + count if count == len(chunk) else count
+            self.pos = len(self.buffer)
+            yield chunk
+
+    def parse_string(self):
+        return json.loads(b'"' + b''.join(self.iter_string()) + b'"')
+
+    def parse_spooled(self):
+        chunks = self.iter_string()
+
+        # data URL header is read before deciding how to decode the string
+        head = b''
+        for chunk in chunks:
+            head += chunk
+            if b',' in head or len(head) > self.header_max_length:
+                break
+
+        match = self.data_url_re.match(head)
+        if match is None:
+            return json.loads(b'"' + head + b''.join(chunks) + b'"')
+
+        media_type, subtype = match.group(1).decode(), match.group(2).decode()
+        file = TemporaryUploadedFile('temp.' + subtype, f'{media_type}/{subtype}', 0, None)
+        self.files.append(file)
+        try:
+            file.size = self.spool(itertools.chain([head[match.end():]], chunks), file)
+        except binascii.Error:
+            file.close()
+            for _ in chunks:
+                pass
+            return 'data:invalid'
+        except ValueError:
+            file.close()
+            raise
+
+        file.seek(0)
+        return file
+
+    @staticmethod
+    def split_escape(data) -> int:
+        """Position of an escape sequence at the end of `data` which may be continued in the next chunk"""
+        start = data.rfind(b'\\', max(len(data) - 6, 0))
+        if start != -1 and count_backslashes(data, 0, start + 1) % 2 and data[start + 1:start + 2] in [b'', b'u']:
+            return start
+        return len(data)
+
+    def unescape(self, data) -> bytes:
+        # same as decoding of the whole string: escapes are decoded and not base64 characters are ignored
+        if b'\\' in data:
+            data = json.loads(b'"' + data + b'"').encode('ascii', 'ignore')
+        return self.not_base64_re.sub(b'', data)
+
+    def spool(self, chunks, file) -> int:
+        size = 0
+        pending = b''
+        for chunk in chunks:
+            data = pending + chunk
+            escape = self.split_escape(data)
+            data, pending = data[:escape], data[escape:]
+
+            data = self.unescape(data)
+            complete = len(data) // 4 * 4
+            decoded = base64.b64decode(data[:complete])
+            file.write(decoded)
+            size += len(decoded)
+            pending = data[complete:] + pending
+
+        if pending:
+            decoded = base64.b64decode(self.unescape(pending))
+            file.write(decoded)
+            size += len(decoded)
+        return size
+
+
+class StreamingJSONParser(BaseParser):
+    """
+    JSON parser which decodes base64 pictures straight into temporary files while reading the request,
+    `PictureField` gets them as uploaded files.
+    """
+
+    media_type = 'application/json'
+    renderer_class = JSONRenderer
+    spooled_keys = ['picture', 'qPic', 'resPic']
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        decoder = JSONStreamDecoder(stream, self.spooled_keys)
+        try:
+            return decoder.decode()
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+        finally:
+            close_with_request(parser_context, decoder.files)
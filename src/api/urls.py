@@ -2,6 +2,7 @@
 /api/tests           -> provides only GET method to list published=True tests
 /api/tests/{id}      -> provides only GET method to retrieve detail published=True test
 /api/tests/{id}/pass -> mark test.id={id} as passed by current (authenticated) user
+/api/tests/suggest   -> GET -> ?q=prefix&limit= titles of the most passed published tests starting with the prefix
 
 /api/tests/my        -> GET  -> list all tests created by current user (test.user = self.request.user)
                      -> POST -> create new test with test.user = self.request.user and published = False
@@ -9,6 +10,12 @@
 /api/tests/my/{id}   -> GET -> retrieve current user's test (test.user = self.request.user)
                      -> PUT -> update test
                      -> DELETE -> delete test
+
+/api/tests/passed         -> GET -> last six tests passed by current user, the last passed first
+/api/tests/passed/history -> GET -> all tests passed by current user, paginated by page or ?cursor=
+
+/api/pictures        -> POST -> upload picture as raw image/* body or multipart `file`,
+                                returned handle upload:{id} is accepted instead of base64 pictures
 """
 from django.urls import path
 
@@ -23,10 +30,14 @@ urlpatterns = [
     path('tests', main.test_list_view, name='tests-list'),
     path('tests/<int:pk>', main.test_detail_view, name='tests-detail'),
     path('tests/<int:pk>/pass', main.TestPassView.as_view(), name='tests-pass'),
+    path('tests/suggest', main.TestSuggestView.as_view(), name='tests-suggest'),
 
     path('tests/my', main.my_tests_list_view, name='tests-my-list'),
     path('tests/my/<int:pk>', main.my_tests_detail_view, name='tests-my-detail'),
 
     path('tests/passed', main.passed_tests_list_view, name='tests-passed-list'),
     path('tests/passed/<int:pk>', main.passed_tests_detail_view, name='tests-passed-detail'),
+    path('tests/passed/history', main.passed_tests_history_view, name='tests-passed-history'),
+
+    path('pictures', main.PictureUploadView.as_view(), name='pictures'),
 ]
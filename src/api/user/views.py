@@ -1,9 +1,11 @@
+from django.conf import settings
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 
 from hypertest.user.models import VKUser, VKUserToken
+from hypertest.user.tokens import make_signed_token
 from api.user.serializers import VKUserSerializer
 
 
@@ -26,6 +28,9 @@ class VKUserAuthView(APIView):
         if vk_user is None:
             raise ValidationError({'query': 'Верификация не пройдена'})
 
+        if settings.SIGNED_TOKENS['enabled']:
+            return Response({'access_token': make_signed_token(vk_user.id)})
+
         vk_user_token, _ = VKUserToken.objects.get_or_create({'user': vk_user}, user=vk_user)
 
         return Response({'access_token': vk_user_token.token})
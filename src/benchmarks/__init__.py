@@ -0,0 +1,11 @@
+"""
+Benchmarks are run from the src directory, e.g. `python -m benchmarks.validation`
+"""
+import os
+
+import django
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings.base')
+    django.setup()
@@ -0,0 +1,90 @@
+"""
+Times the catalog filtered by `passed` for one user on a seeded test database and prints the query plans.
+Page number requests measure the anti-join, cursor requests of not passed tests the user's bitmap.
+
+    python -m benchmarks.passed_filter [tests] [passes] [users] [pages]
+
+Defaults are 100k tests and 10M passes of 100k users, seeding takes a while.
+"""
+import random
+import sys
+import time
+from datetime import timedelta
+
+from benchmarks import setup
+
+
+def seed(tests_count, passes_count, users_count):
+    from django.db import connection
+    from django.utils import timezone
+
+    from hypertest.main.models import Test
+    from hypertest.user.models import VKUser
+
+    now = timezone.now()
+    VKUser.objects.bulk_create([VKUser(id=idx) for idx in range(1, users_count + 1)])
+    Test.objects.bulk_create([Test(title=f'test {idx}', published=idx % 10 != 0, gender=idx % 3,
+                                   publish_date=now - timedelta(minutes=idx)) for idx in range(tests_count)])
+    tests_ids = list(Test.objects.values_list('id', flat=True))
+
+    passes_per_user = passes_count // users_count
+    with connection.cursor() as cursor:
+        for user_id in range(1, users_count + 1):
+            rows = [(test_id, user_id, now) for test_id in random.sample(tests_ids, passes_per_user)]
+            cursor.executemany('INSERT INTO test_pass (test_id, user_id, date) VALUES (%s, %s, %s)', rows)
+        cursor.execute('ANALYZE')
+
+
+def main(tests_count=100000, passes_count=10000000, users_count=100000, pages=10):
+    setup()
+
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from api.main import test_list_view
+    from api.main.cache import catalog_cache
+    from hypertest.user.models import VKUser
+
+    catalog_cache.enabled = False
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        print(f'Seeding {tests_count} tests, {passes_count} passes of {users_count} users')
+        seed(tests_count, passes_count, users_count)
+        user = VKUser.objects.get(id=1)
+
+        def get(params):
+            request = APIRequestFactory().get('/api/tests', params)
+            force_authenticate(request, user)
+            return test_list_view(request).data
+
+        # cursor pages of not passed tests are filtered by the user's bitmap, page numbers use the anti-join
+        for params in [{'passed': False}, {'passed': True}, {'passed': False, 'gender': 1}]:
+            for paginated_by in ['page', 'cursor']:
+                cursor = ''
+                started = time.perf_counter()
+                with CaptureQueriesContext(connection) as context:
+                    for page in range(1, pages + 1):
+                        if paginated_by == 'page':
+                            get(dict(params, page=page))
+                            continue
+
+                        cursor = get(dict(params, cursor=cursor))['_metadata']['next_cursor']
+                        if cursor is None:
+                            break
+                elapsed = (time.perf_counter() - started) / pages
+                print(f'  {params} by {paginated_by}: {elapsed * 1000:8.2f} ms per page')
+
+                sql = next(query['sql'] for query in context.captured_queries
+                           if 'FROM "test" ' in query['sql'] and 'LIMIT' in query['sql'])
+                with connection.cursor() as db_cursor:
+                    explain = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+                    db_cursor.execute(explain + sql)
+                    for row in db_cursor.fetchall():
+                        print('    ' + str(row[-1]))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
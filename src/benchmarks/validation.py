@@ -0,0 +1,59 @@
+"""
+Compares compiled fast path of TestSerializer validation against per-item serializers.
+
+    python -m benchmarks.validation [questions] [answers] [repeat]
+"""
+import sys
+import timeit
+
+from benchmarks import setup
+
+
+def make_payload(questions_count, answers_count, results_count=10):
+    return {
+        'title': 'title',
+        'description': 'description',
+        'results': [
+            {'resId': idx, 'resText': f'result {idx}', 'resDesc': 'description', 'resPic': None}
+            for idx in range(results_count)
+        ],
+        'questions': [
+            {
+                'qId': question_idx,
+                'qText': f'question {question_idx}',
+                'qPic': None,
+                'vars': [
+                    {'varId': answer_idx, 'varText': f'answer {answer_idx}', 'res': answer_idx % results_count}
+                    for answer_idx in range(answers_count)
+                ]
+            }
+            for question_idx in range(questions_count)
+        ]
+    }
+
+
+def main(questions_count=100, answers_count=10, repeat=5):
+    setup()
+
+    from rest_framework.test import APIRequestFactory
+
+    from api.main.serializers import TestSerializer, TestElementListField
+    from hypertest.user.models import VKUser
+
+    request = APIRequestFactory().post('/')
+    request.user = VKUser(id=1)
+    payload = make_payload(questions_count, answers_count)
+
+    def validate():
+        serializer = TestSerializer(data=payload, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+
+    print(f'TestSerializer validation, {questions_count} questions x {answers_count} answers, best of {repeat}')
+    for fast_validation in [False, True]:
+        TestElementListField.fast_validation = fast_validation
+        best = min(timeit.repeat(validate, number=1, repeat=repeat))
+        print(f'  {"compiled" if fast_validation else "serializers":>12}: {best * 1000:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
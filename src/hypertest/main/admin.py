@@ -1,6 +1,24 @@
 from django.contrib import admin
 
-from .models import Test, Result, Question, Answer
+from .models import Test, Result, Question, Answer, PictureUpload
+
+
+class TestContentAdminMixin:
+    """Materialized content and snapshot of the test are rendered again after changes made in admin"""
+
+    def get_test_id(self, obj):
+        return obj.test_id
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        self.reset_test_content(form.instance)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self.reset_test_content(obj)
+
+    def reset_test_content(self, obj):
+        Test.objects.filter(pk=self.get_test_id(obj)).update(content=None, snapshot=None)
 
 
 class TestResultAdminInline(admin.TabularInline):
@@ -11,18 +29,26 @@ class TestQuestionAdminInline(admin.TabularInline):
     model = Question
 
 
-class TestAdmin(admin.ModelAdmin):
+class TestAdmin(TestContentAdminMixin, admin.ModelAdmin):
     inlines = [TestResultAdminInline, TestQuestionAdminInline]
 
+    def get_test_id(self, obj):
+        return obj.pk
+
 
 class AnswerInline(admin.TabularInline):
     model = Answer
 
 
-class QuestionAdmin(admin.ModelAdmin):
+class QuestionAdmin(TestContentAdminMixin, admin.ModelAdmin):
     inlines = [AnswerInline]
 
 
+class ResultAdmin(TestContentAdminMixin, admin.ModelAdmin):
+    pass
+
+
 admin.site.register(Test, TestAdmin)
 admin.site.register(Question, QuestionAdmin)
-admin.site.register(Result)
+admin.site.register(Result, ResultAdmin)
+admin.site.register(PictureUpload)
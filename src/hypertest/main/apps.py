@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class MainConfig(AppConfig):
     name = 'hypertest.main'
+
+    def ready(self):
+        # connects receivers of the module
+        from . import bitmaps, search, suggestions  # noqa: F401
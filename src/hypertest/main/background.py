@@ -0,0 +1,52 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+
+
+class ProcessState:
+    """Tracks the process which set up per-process state, state and threads are not inherited by forked workers"""
+
+    def __init__(self):
+        self.pid = None
+
+    def is_new(self) -> bool:
+        """True on the first call in every process, the caller sets up its state again"""
+        pid = os.getpid()
+        if self.pid == pid:
+            return False
+        self.pid = pid
+        return True
+
+
+class BackgroundExecutor:
+    """Thread pool of the process for work which is done after the response, runs tasks in place with no workers"""
+
+    def __init__(self, workers, name):
+        self.workers = workers
+        self.name = name
+
+        self.lock = threading.Lock()
+        self.executor = None
+        self.process = ProcessState()
+
+    def submit(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        return self.get_executor().submit(self.run, fn, *args)
+
+    def get_executor(self):
+        with self.lock:
+            if self.process.is_new():
+                self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix=self.name)
+            return self.executor
+
+    @staticmethod
+    def run(fn, *args):
+        # tasks use the database from pool's threads
+        close_old_connections()
+        try:
+            return fn(*args)
+        finally:
+            close_old_connections()
@@ -0,0 +1,117 @@
+import zlib
+
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from hypertest.main.models import TestPass, PassedBitmap
+
+
+class TestsBitmap:
+    """
+    Set of tests' ids stored as a zlib compressed bit array, the bit `id % 8` of the byte `id // 8` is set.
+
+    Sparse bitmaps of users who passed a few tests take a few bytes, membership is checked in O(1) after
+    the bitmap is decompressed.
+    """
+
+    def __init__(self, data=b''):
+        self.bits = bytearray(zlib.decompress(data)) if data else bytearray()
+
+    @classmethod
+    def from_ids(cls, ids):
+        bitmap = cls()
+        for test_id in ids:
+            bitmap.add(test_id)
+        return bitmap
+
+    def __contains__(self, test_id):
+        idx = test_id >> 3
+        return idx < len(self.bits) and bool(self.bits[idx] >> (test_id & 7) & 1)
+
+    def __len__(self):
+        return sum(bin(byte).count('1') for byte in self.bits)
+
+    def add(self, test_id):
+        idx = test_id >> 3
+        if idx >= len(self.bits):
+            self.bits.extend(bytes(idx + 1 - len(self.bits)))
+        self.bits[idx] |= 1 << (test_id & 7)
+
+    def update(self, other):
+        if len(other.bits) > len(self.bits):
+            self.bits.extend(bytes(len(other.bits) - len(self.bits)))
+        for idx, byte in enumerate(other.bits):
+            self.bits[idx] |= byte
+
+    def to_bytes(self) -> bytes:
+        return zlib.compress(bytes(self.bits), 9)
+
+
+def build_passed_bitmap(user_id) -> TestsBitmap:
+    return TestsBitmap.from_ids(TestPass.objects.filter(user_id=user_id).values_list('test_id', flat=True))
+
+
+def get_passed_bitmap(user_id) -> TestsBitmap:
+    """Tests passed by the user, the bitmap is built from passes on the first request"""
+    data = PassedBitmap.objects.filter(user_id=user_id).values_list('bitmap', flat=True).first()
+    if data is not None:
+        return TestsBitmap(bytes(data))
+
+    bitmap = build_passed_bitmap(user_id)
+    try:
+        with transaction.atomic():
+            PassedBitmap.objects.create(user_id=user_id, bitmap=bitmap.to_bytes())
+    except IntegrityError:
+        # created concurrently, it may miss passes which were not committed yet when it was built
+        merge_passed_bitmaps({user_id: bitmap})
+    return bitmap
+
+
+def merge_passed_bitmaps(bitmaps) -> int:
+    """
+    Stores bitmaps by user id merged with the stored ones under the lock, so passes added concurrently are kept.
+    Returns the size of the stored bitmaps
+    """
+    with transaction.atomic():
+        stored = PassedBitmap.objects.select_for_update().filter(user_id__in=list(bitmaps))
+        stored = {user_id: TestsBitmap(bytes(data)) for user_id, data in stored.values_list('user_id', 'bitmap')}
+
+        changed = []
+        created = []
+        size = 0
+        for user_id, bitmap in bitmaps.items():
+            if user_id in stored:
+                bitmap.update(stored[user_id])
+            obj = PassedBitmap(user_id=user_id, bitmap=bitmap.to_bytes())
+            size += len(obj.bitmap)
+            if user_id not in stored:
+                created.append(obj)
+            elif bitmap.bits != stored[user_id].bits:
+                changed.append(obj)
+
+        PassedBitmap.objects.bulk_update(changed, ['bitmap'])
+        # bitmaps created concurrently are built from the committed passes
+        PassedBitmap.objects.bulk_create(created, ignore_conflicts=True)
+    return size
+
+
+def add_passed(user_id, test_id):
+    with transaction.atomic():
+        data = PassedBitmap.objects.select_for_update().filter(user_id=user_id).values_list('bitmap', flat=True)
+        data = data.first()
+        if data is None:
+            # the new pass is already inserted
+            get_passed_bitmap(user_id)
+            return
+
+        bitmap = TestsBitmap(bytes(data))
+        if test_id not in bitmap:
+            bitmap.add(test_id)
+            PassedBitmap.objects.filter(user_id=user_id).update(bitmap=bitmap.to_bytes())
+
+
+@receiver(post_save, sender=TestPass)
+def add_passed_to_bitmap(sender, instance, created=False, **kwargs):
+    if created:
+        add_passed(instance.user_id, instance.test_id)
@@ -0,0 +1,101 @@
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from hypertest.main.background import BackgroundExecutor
+from hypertest.main.derivatives import derivatives
+from hypertest.main.models import PictureUpload
+from hypertest.main.references import count_references, release_pictures, get_modified_time
+
+
+class PicturesCollector:
+    """
+    Deletes files of the pictures storage which are not referenced by picture columns.
+
+    Pictures which are replaced or deleted by the api are released after the commit in the background, all other
+    files are collected by walking the storage in batches, see `collect_pictures` command. Files modified in the last
+    `grace_period` seconds are kept since rows referencing them may be not committed yet. Upload handles expire
+    after `upload_ttl` seconds, files of expired uploads are kept only if pictures reference them.
+    """
+
+    def __init__(self, batch_size=500, grace_period=60 * 60, upload_ttl=24 * 60 * 60, workers=1):
+        self.batch_size = batch_size
+        self.grace_period = grace_period
+        self.upload_ttl = upload_ttl
+        self.background = BackgroundExecutor(workers, 'pictures-collector')
+
+    @property
+    def storage(self):
+        return PictureUpload._meta.get_field('file').storage
+
+    def schedule(self, names):
+        """Releases pictures which may be not referenced anymore after the transaction is committed"""
+        names = sorted(set(name for name in names if name))
+        if names:
+            transaction.on_commit(lambda: self.background.submit(self.release, names))
+
+    def release(self, names):
+        return release_pictures(names, modified_before=time.time() - self.grace_period)
+
+    def get_uploads_expiry(self):
+        return timezone.now() - timedelta(seconds=self.upload_ttl)
+
+    def expire_uploads(self) -> int:
+        """Deletes expired upload handles, their files are deleted by `collect`"""
+        count, _ = PictureUpload.objects.filter(date__lt=self.get_uploads_expiry()).delete()
+        return count
+
+    def iter_names(self, start_after=None):
+        """Names of all stored files ordered by their path components, hidden files are skipped"""
+        if not os.path.isdir(self.storage.location):
+            return
+        yield from self.walk([], start_after.split('/') if start_after else None)
+
+    def walk(self, parts, after):
+        with os.scandir(os.path.join(self.storage.location, *parts)) as entries:
+            entries = sorted(entries, key=lambda entry: entry.name)
+
+        for entry in entries:
+            path = parts + [entry.name]
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir():
+                # directories before the position are done
+                if after is None or path >= after[:len(path)]:
+                    yield from self.walk(path, after)
+            elif after is None or path > after:
+                yield '/'.join(path)
+
+    def iter_batches(self, start_after=None):
+        batch = []
+        for name in self.iter_names(start_after):
+            batch.append(name)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def collect(self, names, dry_run=False) -> list:
+        """Deletes unreferenced files and derivatives of unreferenced pictures of the batch"""
+        # derivatives are referenced by their pictures
+        owners = {name: derivatives.get_original_name(name) or name for name in names}
+        counts = count_references(owners.values(), uploaded_after=self.get_uploads_expiry())
+        modified_before = time.time() - self.grace_period
+
+        deleted = []
+        for name in names:
+            if counts[owners[name]] or get_modified_time(self.storage, name) > modified_before:
+                continue
+            if not dry_run:
+                self.storage.delete(name)
+            deleted.append(name)
+
+        return deleted
+
+
+pictures_collector = PicturesCollector(**getattr(settings, 'PICTURES_COLLECTOR', {}))
@@ -0,0 +1,107 @@
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from hypertest.main.background import ProcessState
+from hypertest.main.models import Test
+from hypertest.main.signals import tests_passed
+
+logger = logging.getLogger(__name__)
+
+
+class ImmediatePassedCounter:
+    """Increments `Test.passed_count` with a single UPDATE without reading the row"""
+
+    def increment(self, test):
+        test.passed_count = F('passed_count') + 1
+        test.save(update_fields=['passed_count'])
+        tests_passed.send(sender=self.__class__, counts={test.pk: 1})
+
+
+class BufferedPassedCounter:
+    """
+    Collects increments per test in-process and flushes them in batches from a background thread.
+
+    Each worker process has its own buffer which is started lazily, so it is safe to use with preforking servers
+    (uWSGI has to be run with enabled threads). Increments are counted only after the transaction is committed.
+    """
+
+    def __init__(self, flush_interval=5, flush_size=1000):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+
+        self.lock = threading.Lock()
+        self.flush_event = threading.Event()
+        self.pending = Counter()
+        self.process = ProcessState()
+
+    def increment(self, test):
+        transaction.on_commit(lambda: self.add(test.pk))
+
+    def add(self, test_id, count=1):
+        with self.lock:
+            self.ensure_started()
+            self.pending[test_id] += count
+            if len(self.pending) >= self.flush_size:
+                self.flush_event.set()
+
+    def ensure_started(self):
+        if not self.process.is_new():
+            return
+
+        self.pending = Counter()
+        threading.Thread(target=self.run, name='passed-counter-flusher', daemon=True).start()
+        atexit.register(self.flush)
+
+    def run(self):
+        while True:
+            self.flush_event.wait(self.flush_interval)
+            self.flush_event.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Cannot flush passed counters')
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+
+        # one UPDATE per distinct increment value
+        tests_ids = defaultdict(list)
+        for test_id, count in pending.items():
+            tests_ids[count].append(test_id)
+
+        try:
+            with transaction.atomic():
+                for count, ids in tests_ids.items():
+                    Test.objects.filter(pk__in=ids).update(passed_count=F('passed_count') + count)
+        except Exception:
+            # keep increments for the next flush
+            with self.lock:
+                self.pending.update(pending)
+            raise
+
+        if pending:
+            tests_passed.send(sender=self.__class__, counts=dict(pending))
+
+
+passed_counter = None
+
+
+def get_passed_counter():
+    global passed_counter
+
+    if passed_counter is None:
+        config = getattr(settings, 'PASSED_COUNTER', {})
+        if config.get('mode', 'immediate') == 'buffered':
+            passed_counter = BufferedPassedCounter(config.get('flush_interval', 5), config.get('flush_size', 1000))
+        else:
+            passed_counter = ImmediatePassedCounter()
+
+    return passed_counter
@@ -0,0 +1,97 @@
+import logging
+from io import BytesIO
+
+from PIL import Image, ImageOps, features
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from hypertest.main.background import BackgroundExecutor
+from hypertest.main.signals import derivatives_ready
+
+logger = logging.getLogger(__name__)
+
+# format name: (Pillow format, Pillow feature required to write it)
+FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+
+
+class Derivatives:
+    """
+    Resized copies of uploaded pictures in every size and format.
+
+    Derivatives of a picture are stored next to each other as derivatives/{name}.{size}.{format}, the last one is
+    written after all others, so its existence means all derivatives of the picture are ready.
+    """
+
+    prefix = 'derivatives/'
+
+    def __init__(self, sizes=(320, 960), formats=('webp', 'jpeg'), quality=80, workers=2):
+        self.sizes = list(sizes)
+        self.formats = [name for name in formats if features.check(FORMATS[name][1])]
+        self.quality = quality
+        self.background = BackgroundExecutor(workers, 'picture-derivatives')
+
+        if len(self.formats) != len(formats):
+            logger.warning('Pillow cannot write derivatives in %s', ', '.join(set(formats) - set(self.formats)))
+
+    def get_names(self, name) -> dict:
+        """Derivatives names of the picture by size and format"""
+        return {str(size): {fmt: f'{self.prefix}{name}.{size}.{fmt}' for fmt in self.formats} for size in self.sizes}
+
+    def get_original_name(self, name):
+        """Name of the picture of the derivative or None if it is not a derivative"""
+        if not name.startswith(self.prefix) or name.count('.') < 2:
+            return None
+        return name[len(self.prefix):].rsplit('.', 2)[0]
+
+    def is_ready(self, name, storage=default_storage) -> bool:
+        if not self.sizes or not self.formats:
+            return False
+        return storage.exists(self.get_names(name)[str(self.sizes[-1])][self.formats[-1]])
+
+    def generate(self, name, storage=default_storage):
+        with storage.open(name) as file:
+            image = Image.open(file)
+            image.load()
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ['RGB', 'RGBA']:
+            image = image.convert('RGBA')
+
+        for size, formats in self.get_names(name).items():
+            resized = image.copy()
+            resized.thumbnail((int(size), int(size)), Image.LANCZOS)
+
+            for fmt, derivative_name in formats.items():
+                data = BytesIO()
+                # jpeg has no transparency
+                (resized.convert('RGB') if fmt == 'jpeg' else resized).save(data, FORMATS[fmt][0],
+                                                                              quality=self.quality)
+                # derivatives are regenerated in place
+                if storage.exists(derivative_name):
+                    storage.delete(derivative_name)
+                storage.save(derivative_name, ContentFile(data.getvalue()))
+
+    def schedule(self, names, test_id=None):
+        """Generates derivatives of pictures which don't have them after the transaction is committed"""
+        names = [name for name in names if name and not self.is_ready(name)]
+        if names:
+            transaction.on_commit(lambda: self.background.submit(self.run, names, test_id))
+
+    def run(self, names, test_id=None):
+        generated = []
+        for name in names:
+            try:
+                self.generate(name)
+                generated.append(name)
+            except Exception:
+                logger.exception('Cannot generate derivatives of %s', name)
+
+        if generated:
+            derivatives_ready.send(sender=self.__class__, names=generated, test_id=test_id)
+
+
+derivatives = Derivatives(**getattr(settings, 'PICTURE_DERIVATIVES', {}))
@@ -0,0 +1,53 @@
+from django.db import models
+from django.db.backends.ddl_references import Statement, Table
+from django.db.models.expressions import OrderBy
+
+
+class NullsLast(OrderBy):
+    """
+    Ordering with NULL values last, it is served by `NullsLastIndex` of the same fields.
+
+    NULL values are the smallest on SQLite, so they are last in the descending order without the `field IS NULL`
+    term which keeps the ordering servable by a plain index.
+    """
+
+    def __init__(self, expression, descending=False):
+        super().__init__(expression, descending=descending, nulls_last=True)
+
+    def as_sqlite(self, compiler, connection):
+        if self.descending and self.nulls_last:
+            return self.as_sql(compiler, connection, template=self.template)
+        return super().as_sqlite(compiler, connection)
+
+
+class NullsLastIndex(models.Index):
+    """
+    Index of an ordering with NULL values of nullable fields last, see `NullsLast`.
+
+    PostgreSQL needs NULLS LAST in the index and SQLite orders ascending fields by `field IS NULL` first, neither
+    can be expressed with fields of the plain `Index`.
+    """
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        vendor = schema_editor.connection.vendor
+        if vendor not in ['postgresql', 'sqlite']:
+            return super().create_sql(model, schema_editor, using, **kwargs)
+
+        columns = []
+        for field_name, order in self.fields_orders:
+            field = model._meta.get_field(field_name)
+            column = schema_editor.quote_name(field.column)
+            if field.null and vendor == 'sqlite' and order != 'DESC':
+                columns.append(f'({column} IS NULL)')
+            if field.null and vendor == 'postgresql':
+                order = f'{order} NULLS LAST'.lstrip()
+            columns.append(f'{column} {order}'.rstrip())
+
+        condition = self._get_condition_sql(model, schema_editor)
+        return Statement(
+            'CREATE INDEX %(name)s ON %(table)s (%(columns)s)%(condition)s',
+            name=schema_editor.quote_name(self.name),
+            table=Table(model._meta.db_table, schema_editor.quote_name),
+            columns=', '.join(columns),
+            condition=f' WHERE {condition}' if condition else '',
+        )
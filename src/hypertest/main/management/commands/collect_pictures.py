@@ -0,0 +1,46 @@
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from hypertest.main.collector import pictures_collector
+
+
+class Command(BaseCommand):
+    help = 'Deletes stored pictures and derivatives which are not referenced by tests, results, questions ' \
+           'and recent uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=pictures_collector.batch_size)
+        parser.add_argument('--dry-run', action='store_true', help='only print files which would be deleted')
+        parser.add_argument('--restart', action='store_true', help='start from the beginning, not the last position')
+        parser.add_argument('--state', help='file with the last processed name, the command resumes from it',
+                            default=os.path.join(tempfile.gettempdir(), 'hypertest-collect-pictures'))
+
+    def handle(self, *args, **options):
+        pictures_collector.batch_size = options['batch_size']
+        state = options['state']
+
+        start_after = None
+        if not options['restart'] and os.path.exists(state):
+            with open(state) as f:
+                start_after = f.read().strip() or None
+            self.stdout.write(f'Resuming after {start_after}')
+
+        if not options['dry_run']:
+            self.stdout.write(f'Expired {pictures_collector.expire_uploads()} uploads')
+
+        checked = deleted = 0
+        for batch in pictures_collector.iter_batches(start_after):
+            for name in pictures_collector.collect(batch, options['dry_run']):
+                self.stdout.write(f'{"Would delete" if options["dry_run"] else "Deleted"} {name}')
+                deleted += 1
+            checked += len(batch)
+
+            if not options['dry_run']:
+                with open(state, 'w') as f:
+                    f.write(batch[-1])
+
+        if os.path.exists(state) and not options['dry_run']:
+            os.remove(state)
+        self.stdout.write(f'Checked {checked} files, deleted {deleted}')
@@ -0,0 +1,38 @@
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+
+from hypertest.main.bitmaps import TestsBitmap, merge_passed_bitmaps
+from hypertest.main.models import TestPass, PassedBitmap
+
+
+class Command(BaseCommand):
+    help = 'Adds passes of users missing in their bitmaps of passed tests, e.g. inserted without signals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users', help='rebuild only the user')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        passes = TestPass.objects.order_by('user_id').values_list('user_id', 'test_id')
+        if options['users']:
+            passes = passes.filter(user_id__in=options['users'])
+
+        count = size = 0
+        batch = {}
+        for user_id, rows in groupby(passes.iterator(), key=lambda row: row[0]):
+            batch[user_id] = TestsBitmap.from_ids(test_id for _, test_id in rows)
+            if len(batch) >= options['batch_size']:
+                size += merge_passed_bitmaps(batch)
+                count += len(batch)
+                batch = {}
+        size += merge_passed_bitmaps(batch)
+        count += len(batch)
+
+        # bitmaps of users without passes are built again on the first request
+        stale = PassedBitmap.objects.exclude(user__tests_passed__isnull=False)
+        if options['users']:
+            stale = stale.filter(user_id__in=options['users'])
+        stale.delete()
+
+        self.stdout.write(f'Rebuilt {count} bitmaps, {size} bytes')
@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hypertest.main.models import Test
+
+from api.main.serializers import render_test_content
+
+
+class Command(BaseCommand):
+    help = 'Backfills materialized content of tests or verifies it against the normalized tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help='compare stored content instead of backfilling')
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            self.verify()
+        else:
+            self.backfill()
+
+    def backfill(self):
+        count = 0
+        for test in Test.objects.filter(content__isnull=True).defer('snapshot').order_by('pk').iterator():
+            content = render_test_content(test)
+            # tests saved in the meantime already have fresh content
+            count += Test.objects.filter(pk=test.pk, content__isnull=True).update(content=content)
+
+        self.stdout.write(f'Backfilled {count} tests')
+
+    def verify(self):
+        mismatched = []
+        queryset = Test.objects.filter(content__isnull=False).defer('snapshot').order_by('pk')
+        for test in queryset.iterator():
+            if json.loads(test.content) != json.loads(render_test_content(test)):
+                mismatched.append(test.pk)
+                self.stderr.write(f'Content of test {test.pk} does not match')
+
+        if mismatched:
+            raise CommandError(f'{len(mismatched)} tests have mismatched content')
+        self.stdout.write('Content of all tests matches')
@@ -0,0 +1,26 @@
+# Generated by Django 3.0.4 on 2026-10-18 07:10
+
+from django.db import migrations, models
+import hypertest.main.indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_auto_20200413_2022'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='test',
+            index=hypertest.main.indexes.NullsLastIndex(condition=models.Q(published=True), fields=['-publish_date', '-id'], name='test_catalog_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(fields=['user', '-creation_date', '-id'], name='test_user_creation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testpass',
+            index=models.Index(fields=['user', '-date'], name='test_pass_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.4 on 2026-10-18 07:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_test_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='content',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Content'),
+        ),
+    ]
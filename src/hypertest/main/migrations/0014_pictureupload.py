@@ -0,0 +1,29 @@
+# Generated by Django 3.0.4 on 2026-10-18 07:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0005_vkusertokenrevocation'),
+        ('main', '0013_test_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PictureUpload',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.ImageField(upload_to='uploads', verbose_name='Файл')),
+                ('date', models.DateTimeField(auto_now_add=True, verbose_name='Upload date')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='picture_uploads', to='user.VKUser', verbose_name='VK User')),
+            ],
+            options={
+                'verbose_name': 'Picture upload',
+                'verbose_name_plural': 'Picture uploads',
+                'db_table': 'picture_upload',
+            },
+        ),
+    ]
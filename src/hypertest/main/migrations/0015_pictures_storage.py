@@ -0,0 +1,34 @@
+# Generated by Django 3.0.4 on 2026-10-18 07:27
+
+from django.db import migrations, models
+import hypertest.main.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_pictureupload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pictureupload',
+            name='file',
+            field=models.ImageField(db_index=True, storage=hypertest.main.storage.HashedStorage(), upload_to='', verbose_name='Файл'),
+        ),
+        migrations.AlterField(
+            model_name='question',
+            name='picture',
+            field=models.ImageField(blank=True, db_index=True, null=True, storage=hypertest.main.storage.HashedStorage(), upload_to='', verbose_name='Picture'),
+        ),
+        migrations.AlterField(
+            model_name='result',
+            name='picture',
+            field=models.ImageField(blank=True, db_index=True, null=True, storage=hypertest.main.storage.HashedStorage(), upload_to='', verbose_name='Picture'),
+        ),
+        migrations.AlterField(
+            model_name='test',
+            name='picture',
+            field=models.ImageField(blank=True, db_index=True, null=True, storage=hypertest.main.storage.HashedStorage(), upload_to='', verbose_name='Picture'),
+        ),
+    ]
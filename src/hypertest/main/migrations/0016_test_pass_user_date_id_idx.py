@@ -0,0 +1,21 @@
+# Generated by Django 3.0.4 on 2026-10-18 07:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_pictures_storage'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='testpass',
+            name='test_pass_user_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='testpass',
+            index=models.Index(fields=['user', '-date', '-id'], name='test_pass_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.0.4 on 2026-10-18 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0016_test_pass_user_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='testpass',
+            index=models.Index(fields=['user', 'test'], name='test_pass_user_test_idx'),
+        ),
+    ]
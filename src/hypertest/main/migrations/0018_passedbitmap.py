@@ -0,0 +1,27 @@
+# Generated by Django 3.0.4 on 2026-10-18 07:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0005_vkusertokenrevocation'),
+        ('main', '0017_test_pass_user_test_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PassedBitmap',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='passed_bitmap', serialize=False, to='user.VKUser', verbose_name='VK User')),
+                ('bitmap', models.BinaryField(default=b'', verbose_name='Bitmap')),
+            ],
+            options={
+                'verbose_name': 'Passed tests bitmap',
+                'verbose_name_plural': 'Passed tests bitmaps',
+                'db_table': 'passed_bitmap',
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 3.0.4 on 2026-10-18 07:38
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRESQL_SQL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX test_search_idx ON test USING gin (search_vector)',
+    'CREATE INDEX test_title_trgm_idx ON test USING gin (title gin_trgm_ops)',
+    "UPDATE test SET search_vector = setweight(to_tsvector('russian', title), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'B')",
+]
+POSTGRESQL_REVERSE_SQL = [
+    'DROP INDEX test_title_trgm_idx',
+    'DROP INDEX test_search_idx',
+]
+
+SQLITE_SQL = [
+    "CREATE VIRTUAL TABLE test_fts USING fts5(title, description, tokenize='unicode61 remove_diacritics 2')",
+    "INSERT INTO test_fts (rowid, title, description) SELECT id, title, coalesce(description, '') FROM test",
+]
+SQLITE_REVERSE_SQL = [
+    'DROP TABLE test_fts',
+]
+
+
+def run_vendor_sql(postgresql, sqlite):
+    def run(apps, schema_editor):
+        # full-text indexes differ by the database and are not a part of the models' state
+        sql = {'postgresql': postgresql, 'sqlite': sqlite}.get(schema_editor.connection.vendor, [])
+        for statement in sql:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0018_passedbitmap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Search vector'),
+        ),
+        migrations.RunPython(run_vendor_sql(POSTGRESQL_SQL, SQLITE_SQL),
+                             run_vendor_sql(POSTGRESQL_REVERSE_SQL, SQLITE_REVERSE_SQL)),
+    ]
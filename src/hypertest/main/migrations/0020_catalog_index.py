@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def recreate_catalog_index(apps, schema_editor):
+    # descending NULL values are last on SQLite without the `publish_date IS NULL` column
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    model = apps.get_model('main', 'Test')
+    index = next(index for index in model._meta.indexes if index.name == 'test_catalog_idx')
+    schema_editor.remove_index(model, index)
+    schema_editor.add_index(model, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0019_test_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(recreate_catalog_index, migrations.RunPython.noop),
+    ]
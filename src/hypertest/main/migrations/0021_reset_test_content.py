@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+def reset_test_content(apps, schema_editor):
+    # content rendered before it stored names of pictures holds relative urls
+    apps.get_model('main', 'Test').objects.update(content=None, snapshot=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0020_catalog_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(reset_test_content, migrations.RunPython.noop),
+    ]
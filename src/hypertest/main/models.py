@@ -1,8 +1,13 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.translation import ugettext as _
 
 from hypertest.user.models import VKUser
 
+from .indexes import NullsLastIndex
+from .managers import TestPassManager
+from .storage import pictures_storage
+
 
 class GenderChoices(models.IntegerChoices):
     ANY = 0, 'Any'
@@ -13,7 +18,7 @@ class GenderChoices(models.IntegerChoices):
 class Test(models.Model):
     title = models.CharField(_('Title'), max_length=127)
     description = models.CharField(_('Description'), max_length=255, blank=True, null=True)
-    picture = models.ImageField(_('Picture'), blank=True, null=True, upload_to='tests')
+    picture = models.ImageField(_('Picture'), blank=True, null=True, storage=pictures_storage, db_index=True)
 
     published = models.BooleanField(_('Published'), default=False)
     vip = models.BooleanField(_('VIP'), default=False)
@@ -29,12 +34,25 @@ class Test(models.Model):
     creation_date = models.DateTimeField(_('Creation date'), auto_now_add=True)
     modification_date = models.DateTimeField(_('Modification date'), auto_now=True)
 
+    # results and questions as they are rendered by the api
+    content = models.TextField(_('Content'), blank=True, null=True, editable=False)
+    # rendered detail of the published test
+    snapshot = models.TextField(_('Snapshot'), blank=True, null=True, editable=False)
+    # title and description for the full-text search on PostgreSQL, see `hypertest.main.search`
+    search_vector = SearchVectorField(_('Search vector'), null=True, editable=False)
+
     class Meta:
         db_table = 'test'
         verbose_name = _('Test')
         verbose_name_plural = _('Tests')
         # ordering = ['-id']
 
+        indexes = [
+            NullsLastIndex(fields=['-publish_date', '-id'], name='test_catalog_idx',
+                           condition=models.Q(published=True)),
+            models.Index(fields=['user', '-creation_date', '-id'], name='test_user_creation_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -44,7 +62,7 @@ class Result(models.Model):
     test = models.ForeignKey(verbose_name=_('Test'), to=Test, on_delete=models.CASCADE, related_name='results')
     text = models.CharField(_('Text'), max_length=255)
     description = models.CharField(_('Description'), max_length=255, blank=True, null=True)
-    picture = models.ImageField(_('Picture'), blank=True, null=True, upload_to='tests-results')
+    picture = models.ImageField(_('Picture'), blank=True, null=True, storage=pictures_storage, db_index=True)
 
     class Meta:
         db_table = 'test_result'
@@ -61,7 +79,7 @@ class Question(models.Model):
     question_id = models.IntegerField(_('Question ID'))
     test = models.ForeignKey(verbose_name=_('Test'), to=Test, on_delete=models.CASCADE, related_name='questions')
     text = models.CharField(_('Text'), max_length=255)
-    picture = models.ImageField(_('Picture'), blank=True, null=True, upload_to='tests-questions')
+    picture = models.ImageField(_('Picture'), blank=True, null=True, storage=pictures_storage, db_index=True)
 
     class Meta:
         db_table = 'test_question'
@@ -98,6 +116,8 @@ class TestPass(models.Model):
     user = models.ForeignKey(verbose_name=_('VK User'), to=VKUser, related_name='tests_passed', on_delete=models.CASCADE)
     date = models.DateTimeField(_('Pass date'), auto_now=True)
 
+    objects = TestPassManager()
+
     class Meta:
         db_table = 'test_pass'
         verbose_name = _('Test pass')
@@ -106,6 +126,41 @@ class TestPass(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['test', 'user'], name='test_pass_unique_idx')
         ]
+        indexes = [
+            models.Index(fields=['user', '-date', '-id'], name='test_pass_user_date_idx'),
+            models.Index(fields=['user', 'test'], name='test_pass_user_test_idx'),
+        ]
 
     def __str__(self):
         return f'User: {self.user.id}, test: {self.test.title} ({self.test.id})'
+
+
+class PassedBitmap(models.Model):
+    """Ids of tests passed by the user as `hypertest.main.bitmaps.TestsBitmap`"""
+
+    user = models.OneToOneField(verbose_name=_('VK User'), to=VKUser, related_name='passed_bitmap',
+                                on_delete=models.CASCADE, primary_key=True)
+    bitmap = models.BinaryField(_('Bitmap'), default=b'')
+
+    class Meta:
+        db_table = 'passed_bitmap'
+        verbose_name = _('Passed tests bitmap')
+        verbose_name_plural = _('Passed tests bitmaps')
+
+    def __str__(self):
+        return f'User: {self.user_id}'
+
+
+class PictureUpload(models.Model):
+    file = models.ImageField(_('File'), storage=pictures_storage, db_index=True)
+    user = models.ForeignKey(verbose_name=_('VK User'), to=VKUser, related_name='picture_uploads',
+                             on_delete=models.CASCADE)
+    date = models.DateTimeField(_('Upload date'), auto_now_add=True)
+
+    class Meta:
+        db_table = 'picture_upload'
+        verbose_name = _('Picture upload')
+        verbose_name_plural = _('Picture uploads')
+
+    def __str__(self):
+        return f'User: {self.user_id}, file: {self.file.name}'
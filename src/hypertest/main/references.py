@@ -0,0 +1,59 @@
+import os
+from collections import Counter
+
+from django.db.models import Count
+
+from hypertest.main.derivatives import derivatives
+from hypertest.main.models import Test, Result, Question, PictureUpload
+
+# columns referencing files of the pictures storage
+PICTURE_FIELDS = [
+    (Test, 'picture'),
+    (Result, 'picture'),
+    (Question, 'picture'),
+    (PictureUpload, 'file'),
+]
+
+
+def count_references(names, uploaded_after=None) -> Counter:
+    """Number of rows referencing each of the files, uploads before `uploaded_after` are not counted"""
+    names = [name for name in names if name]
+    counts = Counter()
+    for model, field in PICTURE_FIELDS:
+        rows = model.objects.filter(**{f'{field}__in': names})
+        if model is PictureUpload and uploaded_after is not None:
+            rows = rows.filter(date__gte=uploaded_after)
+        rows = rows.values(field).annotate(count=Count('pk'))
+        counts.update({row[field]: row['count'] for row in rows})
+    return counts
+
+
+def get_modified_time(storage, name) -> float:
+    try:
+        return os.path.getmtime(storage.path(name))
+    except FileNotFoundError:
+        return 0
+
+
+def release_pictures(names, modified_before=None) -> list:
+    """
+    Deletes files which are not referenced anymore with their derivatives, returns names of deleted files.
+
+    Files modified after `modified_before` timestamp are kept, they may be referenced by uncommitted rows.
+    """
+    names = set(name for name in names if name)
+    counts = count_references(names)
+
+    deleted = []
+    storage = PictureUpload._meta.get_field('file').storage
+    for name in sorted(names):
+        if counts[name] or modified_before is not None and get_modified_time(storage, name) > modified_before:
+            continue
+
+        for formats in derivatives.get_names(name).values():
+            for derivative_name in formats.values():
+                storage.delete(derivative_name)
+        storage.delete(name)
+        deleted.append(name)
+
+    return deleted
@@ -0,0 +1,97 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db import connection
+from django.db.models import BooleanField, F, FloatField, Func, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from hypertest.main.models import Test
+
+# text search configuration of tests' titles and descriptions on PostgreSQL
+SEARCH_CONFIG = 'russian'
+
+# SQLite full-text table, its rowid is the test's id
+FTS_TABLE = 'test_fts'
+
+
+class TrigramSimilar(Func):
+    """`expression % query` of pg_trgm, it is served by the trigram index"""
+
+    arg_joiner = ' %% '
+    template = '(%(expressions)s)'
+    output_field = BooleanField()
+
+
+def get_search_vector():
+    return SearchVector('title', weight='A', config=SEARCH_CONFIG) + \
+        SearchVector('description', weight='B', config=SEARCH_CONFIG)
+
+
+def get_fts_query(text) -> str:
+    # every word is matched as a prefix, so the query syntax of FTS5 is not exposed
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+def search_tests(queryset, text):
+    """Tests matching the text annotated with `search_rank`, the most relevant first"""
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(text, config=SEARCH_CONFIG)
+        # real rank is compared as double precision by the keyset pagination, the cursor keeps the cast value
+        rank = Cast(SearchRank(F('search_vector'), query) + TrigramSimilarity('title', text), FloatField())
+        queryset = queryset.annotate(search_rank=rank).filter(
+            Q(search_vector=query) | Q(TrigramSimilar(F('title'), Value(text)))
+        )
+    else:
+        match = get_fts_query(text)
+        if not match:
+            return queryset.none()
+
+        # the query consists of quoted words only, it is inlined since params of the rank are lost when it is
+        # repeated by the keyset pagination
+        rank = RawSQL(f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH \'{match}\' '
+                      f'AND {FTS_TABLE}.rowid = "test"."id"', [], output_field=FloatField())
+        matched = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        queryset = queryset.annotate(search_rank=rank).filter(id__in=matched)
+
+    return queryset.order_by('-search_rank', '-id')
+
+
+def update_search_index(tests_ids):
+    if connection.vendor == 'postgresql':
+        Test.objects.filter(pk__in=tests_ids).update(search_vector=get_search_vector())
+        return
+
+    placeholders = ', '.join(['%s'] * len(tests_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', tests_ids)
+        cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, title, description) '
+                       f'SELECT id, title, coalesce(description, \'\') FROM test WHERE id IN ({placeholders})',
+                       tests_ids)
+
+
+@receiver(post_init, sender=Test)
+def remember_search_text(sender, instance, **kwargs):
+    # deferred fields are not loaded to keep them deferred
+    instance.search_text = (instance.__dict__.get('title'), instance.__dict__.get('description'))
+
+
+@receiver(post_save, sender=Test)
+def index_test(sender, instance, created=False, update_fields=None, **kwargs):
+    if update_fields is not None and not {'title', 'description'} & set(update_fields):
+        return
+
+    search_text = (instance.title, instance.description)
+    if created or search_text != instance.search_text:
+        update_search_index([instance.pk])
+        instance.search_text = search_text
+
+
+@receiver(post_delete, sender=Test)
+def unindex_test(sender, instance, **kwargs):
+    # the search vector is deleted with the row
+    if connection.vendor != 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [instance.pk])
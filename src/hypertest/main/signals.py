@@ -0,0 +1,43 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from hypertest.main.models import Test
+
+# sent after tests' passed_count is incremented, `counts` maps test id to the increment
+tests_passed = Signal(providing_args=['counts'])
+
+# sent when derivatives of pictures `names` are generated, `test_id` is the test they belong to if any
+derivatives_ready = Signal(providing_args=['names', 'test_id'])
+
+# sent after a test which is or was published is saved or deleted, saves of passes don't send it
+catalog_changed = Signal(providing_args=['instance', 'published', 'was_published'])
+
+
+def is_passes_update(update_fields) -> bool:
+    """Passes are saved with update_fields, they are counted by tests_passed"""
+    return update_fields is not None and set(update_fields) == {'passed_count'}
+
+
+@receiver(post_init, sender=Test)
+def remember_published(sender, instance, **kwargs):
+    # deferred field is not loaded to keep it deferred
+    instance.was_published = instance.__dict__.get('published', True)
+
+
+@receiver(post_save, sender=Test)
+def send_catalog_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    if is_passes_update(update_fields):
+        return
+
+    # instances created before the receiver was connected are treated as published
+    was_published = not created and getattr(instance, 'was_published', True)
+    instance.was_published = instance.published
+    if instance.published or was_published:
+        catalog_changed.send(sender, instance=instance, published=instance.published, was_published=was_published)
+
+
+@receiver(post_delete, sender=Test)
+def send_catalog_deleted(sender, instance, **kwargs):
+    was_published = getattr(instance, 'was_published', True)
+    if was_published:
+        catalog_changed.send(sender, instance=instance, published=False, was_published=was_published)
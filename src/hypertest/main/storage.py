@@ -0,0 +1,49 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class HashedStorage(FileSystemStorage):
+    """
+    Stores files by the content's hash as {prefix}/ab/cd/abcd....{ext}.
+
+    Saving the content which is already stored returns the stored file's name without writing it again, so the same
+    file may be referenced by many rows, see `hypertest.main.references`. Stored files are never changed and could
+    be cached forever, their modification time is the time they were saved last.
+    """
+
+    def __init__(self, prefix='pictures', **kwargs):
+        super().__init__(**kwargs)
+        self.prefix = prefix
+
+    def get_hashed_name(self, name, content) -> str:
+        sha = hashlib.sha256()
+        for chunk in content.chunks():
+            sha.update(chunk)
+        digest = sha.hexdigest()
+
+        ext = os.path.splitext(name)[1].lower()
+        return f'{self.prefix}/{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        name = self.get_hashed_name(name, content)
+        try:
+            # the stored file is touched, so it is not collected until the row referencing it is committed
+            os.utime(self.path(name))
+            return name
+        except FileNotFoundError:
+            pass
+        # concurrently saved duplicate gets an available name
+        return self._save(self.get_available_name(name, max_length=max_length), content)
+
+
+pictures_storage = HashedStorage()
@@ -0,0 +1,205 @@
+import bisect
+import heapq
+import threading
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from hypertest.main.background import ProcessState
+from hypertest.main.models import Test
+from hypertest.main.signals import is_passes_update, tests_passed
+
+
+def normalize_title(title) -> str:
+    return ' '.join(title.casefold().split()).replace('ё', 'е')
+
+
+class TitleSuggestions:
+    """
+    In-memory prefix index of published tests' titles, suggestions are ordered by `passed_count`.
+
+    Entries `(normalized title, -passed_count, -id)` are kept sorted, so titles starting with a prefix are a slice
+    found by bisection. Every worker process builds its own index of at most `max_size` most passed tests lazily.
+    Changes of tests update the index of the process that made them, other processes see them when the index is
+    rebuilt after `ttl` seconds.
+
+    The `top_size` best ranks `(-passed_count, -id)` of prefixes up to `top_prefix_length` characters are built
+    with the index, those of longer prefixes matching more than `memo_threshold` titles are memoized on the first
+    request. Both are updated with every change, so prefixes matching many titles are served without their slices.
+    """
+
+    def __init__(self, max_size=50000, ttl=10 * 60, top_size=20, top_prefix_length=3, memo_threshold=256,
+                 memo_size=1000):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.top_size = top_size
+        self.top_prefix_length = top_prefix_length
+        self.memo_threshold = memo_threshold
+        self.memo_size = memo_size
+
+        self.lock = threading.Lock()
+        self.process = ProcessState()
+        self.built_at = None
+        self.entries = []
+        self.titles = {}
+        self.tops = {}
+        self.memo = {}
+
+    def check_built(self):
+        if self.process.is_new() or self.built_at is None or self.built_at + self.ttl < time.monotonic():
+            self.build()
+
+    def build(self):
+        rows = Test.objects.filter(published=True).order_by('-passed_count', '-id')
+        rows = rows.values_list('id', 'title', 'passed_count')[:self.max_size]
+
+        self.titles = {test_id: (normalize_title(title), -passed_count, -test_id, title)
+                       for test_id, title, passed_count in rows}
+        self.entries = sorted(entry[:3] for entry in self.titles.values())
+
+        # titles are iterated from the best rank, so every list is filled in order
+        self.tops = {}
+        for entry in self.titles.values():
+            for length in range(1, min(len(entry[0]), self.top_prefix_length) + 1):
+                top = self.tops.setdefault(entry[0][:length], [])
+                if len(top) < self.top_size:
+                    top.append(entry[1:3])
+
+        self.memo = {}
+        self.built_at = time.monotonic()
+
+    def suggest(self, prefix, limit=10) -> list:
+        """`(id, title)` of the most passed tests which titles start with the prefix"""
+        prefix = normalize_title(prefix)
+        if not prefix or limit <= 0:
+            return []
+
+        with self.lock:
+            self.check_built()
+
+            ranks = self.get_top(prefix) if limit <= self.top_size else None
+            if ranks is None:
+                ranks = self.find_ranks(prefix, limit)
+            return [(-test_id, self.titles[-test_id][3]) for _, test_id in ranks[:limit]]
+
+    def get_top(self, prefix) -> list or None:
+        """Kept best ranks of the prefix, None if the prefix matches a few titles"""
+        if len(prefix) <= self.top_prefix_length:
+            return self.tops.get(prefix, [])
+
+        top = self.memo.get(prefix)
+        if top is None and self.count(prefix) > self.memo_threshold:
+            if len(self.memo) >= self.memo_size:
+                self.memo = {}
+            top = self.memo[prefix] = self.find_ranks(prefix, self.top_size)
+        return top
+
+    def get_slice(self, prefix) -> tuple:
+        start = bisect.bisect_left(self.entries, (prefix,))
+        return start, bisect.bisect_left(self.entries, (prefix + '\U0010ffff',), start)
+
+    def count(self, prefix) -> int:
+        start, end = self.get_slice(prefix)
+        return end - start
+
+    def find_ranks(self, prefix, limit) -> list:
+        start, end = self.get_slice(prefix)
+        return heapq.nsmallest(limit, (entry[1:] for entry in self.entries[start:end]))
+
+    def get_kept_top(self, prefix, create=False) -> list or None:
+        if len(prefix) <= self.top_prefix_length:
+            return self.tops.setdefault(prefix, []) if create else self.tops.get(prefix)
+        return self.memo.get(prefix)
+
+    def update(self, test_id, title, passed_count):
+        with self.lock:
+            if self.built_at is None:
+                return
+            if test_id not in self.titles and len(self.titles) >= self.max_size:
+                # rebuilt index keeps the most passed tests
+                return
+
+            self.discard(test_id)
+            self.add((normalize_title(title), -passed_count, -test_id, title))
+
+    def remove(self, test_id):
+        with self.lock:
+            if self.built_at is not None:
+                self.discard(test_id)
+
+    def passed(self, counts):
+        with self.lock:
+            if self.built_at is None:
+                return
+
+            for test_id, count in counts.items():
+                entry = self.titles.get(test_id)
+                if entry is not None:
+                    # ranks only get better, the entry returns to the lists it is removed from
+                    self.discard(test_id, refill=False)
+                    self.add((entry[0], entry[1] - count, entry[2], entry[3]))
+
+    def add(self, entry):
+        self.titles[-entry[2]] = entry
+        bisect.insort(self.entries, entry[:3])
+
+        rank = entry[1:3]
+        for length in range(1, len(entry[0]) + 1):
+            top = self.get_kept_top(entry[0][:length], create=True)
+            if top is not None and (len(top) < self.top_size or rank < top[-1]):
+                bisect.insort(top, rank)
+                del top[self.top_size:]
+
+    def discard(self, test_id, refill=True) -> bool:
+        entry = self.titles.pop(test_id, None)
+        if entry is None:
+            return False
+        del self.entries[bisect.bisect_left(self.entries, entry[:3])]
+
+        rank = entry[1:3]
+        for length in range(1, len(entry[0]) + 1):
+            prefix = entry[0][:length]
+            top = self.get_kept_top(prefix)
+            idx = bisect.bisect_left(top, rank) if top is not None else 0
+            if top is None or idx == len(top) or top[idx] != rank:
+                continue
+
+            del top[idx]
+            if refill and len(top) == self.top_size - 1:
+                # the next title of the prefix is not in the list
+                top[:] = self.find_ranks(prefix, self.top_size)
+        return True
+
+    def clear(self):
+        with self.lock:
+            self.built_at = None
+            self.entries = []
+            self.titles = {}
+            self.tops = {}
+            self.memo = {}
+
+
+title_suggestions = TitleSuggestions(**getattr(settings, 'TITLE_SUGGESTIONS', {}))
+
+
+@receiver(post_save, sender=Test)
+def update_title_suggestions(sender, instance, update_fields=None, **kwargs):
+    if is_passes_update(update_fields):
+        return
+
+    if instance.published:
+        title_suggestions.update(instance.pk, instance.title, instance.passed_count)
+    else:
+        title_suggestions.remove(instance.pk)
+
+
+@receiver(post_delete, sender=Test)
+def remove_title_suggestion(sender, instance, **kwargs):
+    title_suggestions.remove(instance.pk)
+
+
+@receiver(tests_passed)
+def count_title_suggestions(sender, counts, **kwargs):
+    title_suggestions.passed(counts)
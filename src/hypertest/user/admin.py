@@ -3,7 +3,7 @@ from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.forms import UserCreationForm
 from django.utils.translation import ugettext as _
 
-from .models import User, VKUser, VKUserToken
+from .models import User, VKUser, VKUserToken, VKUserTokenRevocation
 
 
 class CustomUserCreationForm(UserCreationForm):
@@ -41,3 +41,4 @@ class CustomUserAdmin(UserAdmin):
 admin.site.register(User, CustomUserAdmin)
 admin.site.register(VKUser)
 admin.site.register(VKUserToken)
+admin.site.register(VKUserTokenRevocation)
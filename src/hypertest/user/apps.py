@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class UserConfig(AppConfig):
     name = 'hypertest.user'
     verbose_name = 'Users'
+
+    def ready(self):
+        # connects receivers of the module
+        from . import tokens  # noqa: F401
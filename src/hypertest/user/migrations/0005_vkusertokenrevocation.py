@@ -0,0 +1,28 @@
+# Generated by Django 3.0.4 on 2026-10-18 07:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0004_auto_20200329_2326'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VKUserTokenRevocation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('revoked_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Revoked at')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='token_revocation', to='user.VKUser', verbose_name='VK user')),
+            ],
+            options={
+                'verbose_name': "VK user's tokens revocation",
+                'verbose_name_plural': "VK users' tokens revocations",
+                'db_table': 'vk_user_token_revocation',
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.0.4 on 2026-10-18 07:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0005_vkusertokenrevocation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vkusertokenrevocation',
+            name='user',
+            field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='token_revocation', to='user.VKUser', verbose_name='VK user'),
+        ),
+    ]
@@ -128,3 +128,19 @@ class VKUserToken(models.Model):
 
     def __str__(self):
         return f'User id: {self.user.id}'
+
+
+class VKUserTokenRevocation(models.Model):
+    """Signed access tokens of the user issued before `revoked_at` are not accepted"""
+    # kept after the user is deleted to revoke the user's tokens
+    user = models.OneToOneField(to=VKUser, on_delete=models.DO_NOTHING, db_constraint=False,
+                                related_name='token_revocation', verbose_name=_('VK user'))
+    revoked_at = models.DateTimeField(_('Revoked at'), default=timezone.now)
+
+    class Meta:
+        db_table = 'vk_user_token_revocation'
+        verbose_name = _('VK user\'s tokens revocation')
+        verbose_name_plural = _('VK users\' tokens revocations')
+
+    def __str__(self):
+        return f'User id: {self.user_id}, revoked at: {self.revoked_at}'
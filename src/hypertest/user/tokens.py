@@ -0,0 +1,134 @@
+"""
+Stateless access tokens: {key id}.{VK user id}.{issued at in microseconds}.{signature}
+
+Tokens are signed with HMAC-SHA256 by the current key of settings.SIGNED_TOKENS['keys'], the other keys are still
+accepted, so keys can be rotated by adding a new one and removing the old one after `ttl` seconds.
+Opaque VKUserToken tokens never contain dots.
+"""
+import base64
+import hashlib
+import hmac
+import threading
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import VKUser, VKUserTokenRevocation
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def get_config():
+    return settings.SIGNED_TOKENS
+
+
+def is_signed_token(token: str) -> bool:
+    return '.' in token
+
+
+def get_signature(key: str, payload: str) -> str:
+    digest = hmac.new(key.encode(), payload.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+
+def get_timestamp(value: datetime = None) -> int:
+    """Microseconds since the epoch"""
+    if value is None:
+        return time.time_ns() // 1000
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def make_signed_token(user_id: int, issued_at: int = None) -> str:
+    config = get_config()
+    key_id = config['current_key']
+    issued_at = get_timestamp() if issued_at is None else issued_at
+
+    payload = f'{key_id}.{user_id}.{issued_at}'
+    return f'{payload}.{get_signature(config["keys"][key_id], payload)}'
+
+
+def verify_signed_token(token: str) -> (int, int):
+    """Returns (VK user id, issued at) of a valid token"""
+    config = get_config()
+
+    try:
+        key_id, user_id, issued_at, signature = token.split('.')
+        user_id, issued_at = int(user_id), int(issued_at)
+    except ValueError:
+        raise InvalidToken('Malformed token')
+
+    key = config['keys'].get(key_id)
+    if key is None:
+        raise InvalidToken('Unknown key')
+
+    if not hmac.compare_digest(signature, get_signature(key, f'{key_id}.{user_id}.{issued_at}')):
+        raise InvalidToken('Invalid signature')
+
+    if issued_at + config['ttl'] * 10 ** 6 < get_timestamp():
+        raise InvalidToken('Token expired')
+
+    if revocations.is_revoked(user_id, issued_at):
+        raise InvalidToken('Token revoked')
+
+    return user_id, issued_at
+
+
+class RevocationList:
+    """
+    In-memory map of VK user id -> revocation timestamp in microseconds, reloaded every `refresh` seconds.
+
+    Only revocations younger than token's ttl are loaded since older tokens are expired anyway.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.revoked = {}
+        self.refresh_at = 0
+
+    def is_revoked(self, user_id, issued_at):
+        if time.monotonic() >= self.refresh_at:
+            self.reload()
+        revoked_at = self.revoked.get(user_id)
+        return revoked_at is not None and issued_at <= revoked_at
+
+    def reload(self):
+        config = get_config()
+        since = timezone.now() - timedelta(seconds=config['ttl'])
+        queryset = VKUserTokenRevocation.objects.filter(revoked_at__gte=since).values_list('user_id', 'revoked_at')
+
+        revoked = {user_id: get_timestamp(revoked_at) for user_id, revoked_at in queryset}
+        with self.lock:
+            self.revoked = revoked
+            self.refresh_at = time.monotonic() + config['revocations_refresh']
+
+    def add(self, user_id, revoked_at):
+        with self.lock:
+            self.revoked[user_id] = get_timestamp(revoked_at)
+
+
+revocations = RevocationList()
+
+
+def revoke_signed_tokens(user):
+    """Revokes all signed tokens of the user issued before now"""
+    revoked_at = timezone.now()
+    VKUserTokenRevocation.objects.update_or_create({'revoked_at': revoked_at}, user_id=user.pk)
+    revocations.add(user.pk, revoked_at)
+
+    # older revocations are useless
+    since = revoked_at - timedelta(seconds=get_config()['ttl'])
+    VKUserTokenRevocation.objects.filter(revoked_at__lt=since).delete()
+
+
+@receiver(post_delete, sender=VKUser)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    revoke_signed_tokens(instance)
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 
     'hypertest.user',
     'hypertest.main',
+    'api',
 ]
 
 MIDDLEWARE = [
@@ -150,6 +151,85 @@ STATIC_ROOT = os.path.join(PROJECT_DIR, 'static')
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(PROJECT_DIR, 'media')
 
+# Total counts of paginated lists are cached for ttl seconds and unfiltered lists' counts for maintained_ttl seconds,
+# on PostgreSQL planner's estimate is reported instead of exact count above estimate_threshold
+
+PAGINATION_COUNT = {
+    'ttl': 30,
+    'maintained_ttl': 10 * 60,
+    'estimate_threshold': 100000,
+}
+
+# Cache of bearer tokens in every worker process, entries are invalidated in all processes by the users' versions
+# in the default cache, which has to be shared by them (see settings.docker). Versions are checked every
+# version_interval seconds
+
+AUTH_TOKEN_CACHE = {
+    'max_size': 10000,
+    'ttl': 60,
+    'version_interval': 5,
+}
+
+# Stateless signed access tokens, if enabled /api/auth issues them instead of VKUserToken.
+# New keys are added to `keys` and become `current_key`, old keys are removed after `ttl` seconds
+
+SIGNED_TOKENS = {
+    'enabled': False,
+    'keys': {
+        '1': SECRET_KEY,
+    },
+    'current_key': '1',
+    'ttl': 30 * 24 * 60 * 60,
+    'revocations_refresh': 60,
+}
+
+# Tests' passes counting: 'immediate' updates test.passed_count on every pass,
+# 'buffered' collects increments in-process and flushes them every flush_interval seconds
+
+PASSED_COUNTER = {
+    'mode': 'immediate',
+    'flush_interval': 5,
+    'flush_size': 1000,
+}
+
+# Cache of the published tests' list shared by worker processes through the default cache, pages are dropped when
+# the catalog changes or passed_count of a test drifts by passed_count_drift
+
+CATALOG_CACHE = {
+    'enabled': True,
+    'ttl': 60,
+    'passed_count_drift': 10,
+}
+
+# Resized copies of uploaded pictures, generated after the upload in `workers` background threads
+# (0 generates them synchronously), formats not supported by Pillow are skipped
+
+PICTURE_DERIVATIVES = {
+    'sizes': [320, 960],
+    'formats': ['webp', 'jpeg'],
+    'quality': 80,
+    'workers': 2,
+}
+
+# Deletion of pictures which are not referenced anymore, replaced and deleted pictures are released in `workers`
+# background threads, all files are collected by `collect_pictures` command in batches. Files modified in the last
+# grace_period seconds are kept. Handles of /api/pictures uploads expire after upload_ttl seconds
+
+PICTURES_COLLECTOR = {
+    'batch_size': 500,
+    'grace_period': 60 * 60,
+    'upload_ttl': 24 * 60 * 60,
+    'workers': 1,
+}
+
+# Prefix index of published tests' titles for suggestions, every worker process keeps max_size most passed tests
+# and rebuilds the index every ttl seconds to see changes made by other processes
+
+TITLE_SUGGESTIONS = {
+    'max_size': 50000,
+    'ttl': 10 * 60,
+}
+
 # VK
 
 VK = {
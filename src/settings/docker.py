@@ -12,6 +12,15 @@ DATABASES = {
     }
 }
 
+# shared by worker processes, see AUTH_TOKEN_CACHE and CATALOG_CACHE
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': 'memcached:11211',
+    }
+}
+
 MEDIA_ROOT = '/code/media'
 STATIC_ROOT = '/code/static'
 STATIC_URL = '/api_static/'
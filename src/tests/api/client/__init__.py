@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from rest_framework.test import APITestCase
 
 from hypertest.user.models import VKUser, VKUserToken
@@ -11,6 +12,7 @@ class AuthenticatedTestCase(APITestCase):
         cls.token = VKUserToken.objects.create(user=cls.user).token
 
     def setUp(self) -> None:
+        cache.clear()
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
 
     def change_user(self, user=None):
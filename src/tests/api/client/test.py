@@ -5,6 +5,8 @@ from copy import deepcopy
 from rest_framework.reverse import reverse
 
 from hypertest.main.models import Test, Result, Question, Answer, TestPass
+from hypertest.user.models import VKUser
+from tests import TemporaryMediaMixin
 from tests.api.client import AuthenticatedTestCase
 
 
@@ -40,7 +42,7 @@ class AvailableMethodsTestCase(AuthenticatedTestCase):
             self.assertEqual(getattr(self.client, method)(uri).status_code, status_code, f'{method, uri, status_code}')
 
 
-class HyperTestTestCase(AuthenticatedTestCase):
+class HyperTestTestCase(TemporaryMediaMixin, AuthenticatedTestCase):
     url = reverse('tests-list')
     url_my = reverse('tests-my-list')
 
@@ -48,6 +50,7 @@ class HyperTestTestCase(AuthenticatedTestCase):
         'title': 'title',
         'description': 'description',
         'picture': None,
+        'pictureVariants': None,
         'isPublished': True,
         'vip': False,
         'price': 1,
@@ -58,12 +61,14 @@ class HyperTestTestCase(AuthenticatedTestCase):
                 'resText': 'result 0',
                 'resDesc': 'result 0 description',
                 'resPic': None,
+                'resPicVariants': None,
             },
             {
                 'resId': 1,
                 'resText': 'result 1',
                 'resDesc': 'result 1 description',
                 'resPic': None,
+                'resPicVariants': None,
             }
         ],
         'questions': [
@@ -71,6 +76,7 @@ class HyperTestTestCase(AuthenticatedTestCase):
                 'qId': 0,
                 'qText': 'question 0',
                 'qPic': None,
+                'qPicVariants': None,
                 'vars': [
                     {
                         'varId': 0,
@@ -88,6 +94,7 @@ class HyperTestTestCase(AuthenticatedTestCase):
                 'qId': 1,
                 'qText': 'question 1',
                 'qPic': None,
+                'qPicVariants': None,
                 'vars': [
                     {
                         'varId': 0,
@@ -416,3 +423,26 @@ class PassedTestsTestCase(AuthenticatedTestCase):
         self.client.post(reverse('tests-pass', [test_1.id]))
         response = self.client.get(self.url_passed).json()
         self.assertEqual(response['items'][0]['id'], test_1.id)
+
+    def test_history(self):
+        tests = [Test.objects.create(title=f'test {idx}', user=self.user) for idx in range(8)]
+        for test in tests:
+            TestPass.objects.create(test=test, user=self.user)
+        # passes of other users are not in the history
+        TestPass.objects.create(test=tests[0], user=VKUser.objects.create(id=self.user.id + 1))
+
+        self.assertEqual(len(self.client.get(self.url_passed).json()['items']), 6)
+
+        url = reverse('tests-passed-history')
+        ids = []
+        data = self.client.get(url, {'cursor': '', 'page_size': 3}).json()
+        while True:
+            ids += [item['id'] for item in data['items']]
+            if data['_metadata']['next_cursor'] is None:
+                break
+            data = self.client.get(url, {'cursor': data['_metadata']['next_cursor'], 'page_size': 3}).json()
+        self.assertEqual(ids, [test.id for test in reversed(tests)])
+
+        data = self.client.get(url, {'page': 2, 'page_size': 5}).json()
+        self.assertEqual(data['_metadata']['total_items'], 8)
+        self.assertEqual([item['id'] for item in data['items']], [test.id for test in reversed(tests[:3])])
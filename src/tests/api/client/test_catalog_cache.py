@@ -0,0 +1,100 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+
+from api.main.cache import catalog_cache
+from hypertest.main.counters import ImmediatePassedCounter
+from hypertest.main.models import Test, TestPass
+from tests.api.client import AuthenticatedTestCase
+
+
+class CatalogCacheTestCase(AuthenticatedTestCase):
+    url = reverse('tests-list')
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tests = [Test.objects.create(title=f'test {idx}', user=cls.user, published=True) for idx in range(3)]
+        TestPass.objects.create(test=cls.tests[0], user=cls.user)
+
+    def get_items(self, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        queried = any('FROM "test" ' in query['sql'] for query in context.captured_queries)
+        return {item['id']: item for item in response.json()['items']}, queried
+
+    def test_cached(self):
+        items, queried = self.get_items()
+        self.assertTrue(queried)
+
+        items, queried = self.get_items()
+        self.assertFalse(queried)
+        self.assertEqual(len(items), 3)
+
+        # other pages and filters are cached separately
+        self.assertTrue(self.get_items({'page_size': 2})[1])
+        self.assertTrue(self.get_items({'gender': 1})[1])
+        self.assertFalse(self.get_items({'gender': 1})[1])
+
+        # filter by passed depends on the user
+        self.assertTrue(self.get_items({'passed': True})[1])
+        self.assertTrue(self.get_items({'passed': True})[1])
+
+    def test_passed_overlay(self):
+        items, _ = self.get_items()
+        self.assertEqual([items[test.id]['passed'] for test in self.tests], [True, False, False])
+
+        self.change_user()
+        TestPass.objects.create(test=self.tests[2], user=self.user)
+        items, queried = self.get_items()
+        self.assertFalse(queried)
+        self.assertEqual([items[test.id]['passed'] for test in self.tests], [False, False, True])
+
+    def test_invalidation(self):
+        self.get_items()
+
+        # drafts are not in the catalog
+        draft = Test.objects.create(title='draft', user=self.user)
+        self.assertFalse(self.get_items()[1])
+
+        draft.published = True
+        draft.save()
+        items, queried = self.get_items()
+        self.assertTrue(queried)
+        self.assertIn(draft.id, items)
+
+        test = Test.objects.get(pk=self.tests[1].pk)
+        test.published = False
+        test.save()
+        items, _ = self.get_items()
+        self.assertNotIn(test.id, items)
+
+        Test.objects.get(pk=self.tests[2].pk).delete()
+        items, _ = self.get_items()
+        self.assertNotIn(self.tests[2].pk, items)
+
+    def test_not_remembered(self):
+        self.get_items()
+
+        # instances created before the receivers were connected
+        test = Test.objects.get(pk=self.tests[0].pk)
+        del test.was_published
+        test.title = 'changed'
+        test.save()
+        self.assertTrue(self.get_items()[1])
+
+    def test_passed_count_drift(self):
+        self.get_items()
+
+        counter = ImmediatePassedCounter()
+        for _ in range(catalog_cache.passed_count_drift - 1):
+            counter.increment(self.tests[1])
+        items, queried = self.get_items()
+        self.assertFalse(queried)
+        self.assertEqual(items[self.tests[1].id]['passedCount'], 0)
+
+        counter.increment(self.tests[1])
+        items, queried = self.get_items()
+        self.assertTrue(queried)
+        self.assertEqual(items[self.tests[1].id]['passedCount'], catalog_cache.passed_count_drift)
@@ -0,0 +1,123 @@
+import re
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.reverse import reverse
+
+from hypertest.main.models import Test, TestPass
+from hypertest.user.models import VKUser
+from tests.api.client import AuthenticatedTestCase
+
+
+class QueryPlansTestCase(AuthenticatedTestCase):
+    """Endpoints' queries on a seeded dataset have to be served by indexes without sequential scans and sorts"""
+
+    tables = ['test', 'test_pass']
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        users = [cls.user] + [VKUser.objects.create(id=idx) for idx in range(2, 6)]
+
+        now = timezone.now()
+        tests = []
+        for idx in range(500):
+            published = idx % 4 != 0
+            publish_date = now - timedelta(hours=idx // 2) if published and idx % 7 else None
+            tests.append(Test(title=f'test {idx}', user=users[idx % len(users)], published=published,
+                              publish_date=publish_date))
+        Test.objects.bulk_create(tests)
+
+        tests = list(Test.objects.filter(published=True))
+        TestPass.objects.bulk_create([TestPass(test=test, user=user) for user in users
+                                      for test in tests[user.id::7]])
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def get_plan(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # on a small dataset postgres prefers scans and sorts whenever an index is not required
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('SET LOCAL enable_sort = off')
+                cursor.execute('EXPLAIN ' + sql)
+                return [row[0] for row in cursor.fetchall()]
+
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertIndexed(self, sql):
+        plan = self.get_plan(sql)
+        for line in plan:
+            if connection.vendor == 'postgresql':
+                bad = re.search(r'\b(Seq Scan|Sort)\b', line)
+            else:
+                bad = re.match(r'\s*SCAN \w+$', line) or 'USE TEMP B-TREE' in line
+            self.assertFalse(bad, '\n'.join([sql] + plan))
+
+    def seeks(self, sql):
+        # the range starts at the position in the index instead of filtering rows from its start
+        for line in self.get_plan(sql):
+            if connection.vendor == 'postgresql':
+                if re.search(r'Index Cond: .*[<>]', line):
+                    return True
+            elif re.match(r'\s*SEARCH \w+ USING (COVERING )?INDEX \w+ \(.*\w+[<>]\?', line):
+                return True
+        return False
+
+    def assertEndpointIndexed(self, url, params, seek=False):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+
+        checked = seeking = 0
+        for query in context.captured_queries:
+            sql = query['sql']
+            # counts are cached or estimated by the count provider
+            if sql.startswith('SELECT COUNT(*)'):
+                continue
+            if sql.startswith('SELECT') and any(f'FROM "{table}"' in sql for table in self.tables):
+                self.assertIndexed(sql)
+                checked += 1
+                seeking += self.seeks(sql)
+        self.assertGreater(checked, 0)
+        if seek:
+            self.assertGreater(seeking, 0, '\n'.join(query['sql'] for query in context.captured_queries))
+        return response.json()
+
+    def assertCursorIndexed(self, url, params, pages=1):
+        """The first cursor page and next ones which seek to the cursor"""
+        data = self.assertEndpointIndexed(url, dict(params, cursor=''))
+        for _ in range(pages):
+            params = dict(params, cursor=data['_metadata']['next_cursor'])
+            data = self.assertEndpointIndexed(url, params, seek=True)
+            if data['_metadata']['next_cursor'] is None:
+                break
+        return data
+
+    def test_tests_list(self):
+        url = reverse('tests-list')
+        self.assertEndpointIndexed(url, {'page': 2, 'page_size': 10})
+
+        data = self.assertCursorIndexed(url, {'page_size': 10}, pages=40)
+        # pages of tests without publish date are reached too
+        self.assertIsNone(data['_metadata']['next_cursor'])
+
+    def test_my_tests_list(self):
+        url = reverse('tests-my-list')
+        self.assertEndpointIndexed(url, {'page': 2, 'page_size': 10})
+
+        self.assertCursorIndexed(url, {'page_size': 10})
+
+    def test_passed_tests_list(self):
+        self.assertEndpointIndexed(reverse('tests-passed-list'), {})
+
+        self.assertCursorIndexed(reverse('tests-passed-history'), {'page_size': 10})
+
+    def test_passed_filter(self):
+        url = reverse('tests-list')
+        for params in [{'passed': False}, {'passed': True}, {'passed': False, 'gender': 1}]:
+            self.assertCursorIndexed(url, dict(params, page_size=10))
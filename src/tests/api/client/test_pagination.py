@@ -0,0 +1,169 @@
+import re
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.reverse import reverse
+
+from api.counts import count_provider, get_generation
+from api.pagination import Pagination
+from hypertest.main.models import Test, TestPass
+from tests.api.client import AuthenticatedTestCase
+
+
+class CursorPaginationTestCase(AuthenticatedTestCase):
+    url = reverse('tests-list')
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        # same publish dates and not published ones
+        for idx in range(25):
+            publish_date = now - timedelta(days=idx // 3) if idx < 19 else None
+            Test.objects.create(title=f'test {idx}', user=cls.user, published=True, publish_date=publish_date)
+        Test.objects.create(title='not published', user=cls.user)
+
+    def get_all_pages(self, url, page_size, params=None):
+        ids = []
+        cursor = ''
+        while cursor is not None:
+            response = self.client.get(url, dict(params or {}, cursor=cursor, page_size=page_size))
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertNotIn('total_items', data['_metadata'])
+            self.assertLessEqual(len(data['items']), page_size)
+            ids += [item['id'] for item in data['items']]
+            cursor = data['_metadata']['next_cursor']
+        return ids
+
+    def test_same_order(self):
+        for url in [self.url, reverse('tests-my-list')]:
+            expected = []
+            page = 1
+            while True:
+                data = self.client.get(url, {'page': page, 'page_size': 40}).json()
+                expected += [item['id'] for item in data['items']]
+                if page == data['_metadata']['total_pages']:
+                    break
+                page += 1
+
+            for page_size in [1, 4, 7, 40]:
+                self.assertEqual(self.get_all_pages(url, page_size), expected, (url, page_size))
+
+    def test_not_passed(self):
+        expected = self.get_all_pages(self.url, 40)
+        # runs of passed tests longer than a page are skipped
+        passed = expected[2:9] + expected[10:11] + expected[-3:]
+        for test_id in passed:
+            TestPass.objects.create(test_id=test_id, user=self.user)
+
+        expected = [test_id for test_id in expected if test_id not in passed]
+        for page_size in [1, 4, 40]:
+            self.assertEqual(self.get_all_pages(self.url, page_size, {'passed': False}), expected, page_size)
+
+        # chunks read after runs of passed tests are capped
+        with mock.patch.object(Pagination, 'max_chunk_size', 3), CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.get_all_pages(self.url, 1, {'passed': False}), expected)
+        limits = [re.findall(r'LIMIT (\d+)', query['sql']) for query in context.captured_queries]
+        self.assertEqual(max(int(limit) for query_limits in limits for limit in query_limits), 3)
+
+        # passes are filtered by the user's bitmap instead of the anti-join
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url, {'passed': False, 'cursor': ''})
+        self.assertFalse(any('EXISTS' in query['sql'] for query in context.captured_queries))
+
+    def test_switch_from_page_number(self):
+        data = self.client.get(self.url, {'page_size': 10}).json()
+        self.assertEqual(data['_metadata']['page'], 1)
+        next_page = self.client.get(self.url, {'page_size': 10, 'page': 2}).json()['items']
+
+        data = self.client.get(self.url, {'page_size': 10, 'cursor': data['_metadata']['next_cursor']}).json()
+        self.assertEqual(data['items'], next_page)
+
+    def test_invalid_cursor(self):
+        for cursor in ['abc', 'WzFd', 'WyJhIiwgMV0=']:
+            self.assertEqual(self.client.get(self.url, {'cursor': cursor}).status_code, 404)
+
+
+class CountsTestCase(AuthenticatedTestCase):
+    url = reverse('tests-list')
+
+    def get_metadata(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        counts = [query for query in context.captured_queries if 'COUNT(*)' in query['sql']]
+        return response.json()['_metadata'], len(counts)
+
+    def test_cached_counts(self):
+        for idx in range(3):
+            Test.objects.create(title=f'test {idx}', user=self.user, published=True, gender=idx)
+        test = Test.objects.create(title='test', user=self.user)
+
+        for url, params, count in [(self.url, {}, 3), (self.url, {'gender': '1'}, 2),
+                                   (reverse('tests-my-list'), {}, 4)]:
+            metadata, queries_count = self.get_metadata(url, **params)
+            self.assertEqual((metadata['total_items'], metadata['total_exact'], queries_count), (count, True, 1))
+
+            metadata, queries_count = self.get_metadata(url, **params)
+            self.assertEqual((metadata['total_items'], queries_count), (count, 0))
+
+        # passes don't invalidate counts
+        self.client.post(reverse('tests-pass', [test.id]))
+        self.assertEqual(self.get_metadata(self.url)[1], 0)
+
+        # neither do drafts
+        generation = get_generation()
+        draft = Test.objects.create(title='draft', user=self.user)
+        draft.title = 'changed'
+        draft.save()
+        draft.delete()
+        self.assertEqual(get_generation(), generation)
+
+        # publishing adjusts the maintained count and invalidates other counts
+        test.published = True
+        test.save()
+        self.assertEqual(self.get_metadata(self.url), ({
+            'page': 1,
+            'page_size': 20,
+            'total_pages': 1,
+            'total_items': 4,
+            'total_exact': True,
+            'max_page_size': 40,
+            'next_cursor': None
+        }, 0))
+        self.assertEqual(self.get_metadata(self.url, gender='1'), ({
+            'page': 1,
+            'page_size': 20,
+            'total_pages': 1,
+            'total_items': 3,
+            'total_exact': True,
+            'max_page_size': 40,
+            'next_cursor': None
+        }, 1))
+
+        Test.objects.get(pk=test.pk).delete()
+        self.assertEqual(self.get_metadata(self.url)[0]['total_items'], 3)
+
+    def test_maintained_count_ttl(self):
+        Test.objects.create(title='test', user=self.user, published=True)
+        self.assertEqual(self.get_metadata(self.url)[0]['total_items'], 1)
+
+        # updates don't send signals, the count is refreshed after ttl
+        Test.objects.update(published=False)
+        self.assertEqual(self.get_metadata(self.url)[0]['total_items'], 1)
+        expired = time.time() + count_provider.maintained_ttl + 1
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=expired):
+            self.assertEqual(self.get_metadata(self.url)[0]['total_items'], 0)
+
+    def test_pages(self):
+        for idx in range(3):
+            Test.objects.create(title=f'test {idx}', user=self.user, published=True)
+
+        self.assertEqual(len(self.client.get(self.url, {'page': 2, 'page_size': 2}).json()['items']), 1)
+        self.assertEqual(self.client.get(self.url, {'page': 3, 'page_size': 2}).status_code, 404)
+        self.assertEqual(self.client.get(self.url, {'page': 'a'}).status_code, 404)
@@ -0,0 +1,160 @@
+import base64
+import json
+import os
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.reverse import reverse
+
+from hypertest.main.collector import pictures_collector
+from hypertest.main.derivatives import derivatives
+from hypertest.main.models import Test, PictureUpload
+from tests import TemporaryMediaMixin
+from tests.api.client import AuthenticatedTestCase
+
+
+class PictureUploadTestCase(TemporaryMediaMixin, AuthenticatedTestCase):
+    url = reverse('pictures')
+
+    with open(os.path.join(os.path.dirname(__file__), 'pic')) as f:
+        pic = base64.b64decode(f.read().split(';base64,')[1])
+
+    def upload_raw(self, content):
+        return self.client.generic('POST', self.url, content, content_type='image/png')
+
+    def test_upload(self):
+        response = self.upload_raw(self.pic)
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data['handle'], f'upload:{data["id"]}')
+
+        upload = PictureUpload.objects.get()
+        self.assertEqual(upload.user, self.user)
+        self.assertTrue(upload.file.name.endswith('.png'))
+        self.assertEqual(upload.file.read(), self.pic)
+
+        response = self.client.post(self.url, {'file': SimpleUploadedFile('pic.png', self.pic)}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(PictureUpload.objects.count(), 2)
+
+    def test_invalid(self):
+        self.assertEqual(self.upload_raw(b'not an image').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {}, format='multipart').status_code, 400)
+        self.assertEqual(PictureUpload.objects.count(), 0)
+
+    def test_handle(self):
+        handle = self.upload_raw(self.pic).json()['handle']
+        name = PictureUpload.objects.get().file.name
+
+        data = {
+            'title': 'test',
+            'picture': handle,
+            'results': [{'resId': 1, 'resText': 'result', 'resPic': handle}],
+            'questions': [{'qId': 1, 'qText': 'question', 'qPic': handle, 'vars': []}],
+        }
+        response = self.client.post(reverse('tests-my-list'), data, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        test = Test.objects.get()
+        self.assertEqual(test.picture.name, name)
+        self.assertEqual(test.results.get().picture.name, name)
+        self.assertEqual(test.questions.get().picture.name, name)
+
+        # uploads of other users cannot be used
+        self.change_user()
+        for handle in [handle, 'upload:', 'upload:x']:
+            data['picture'] = handle
+            response = self.client.post(reverse('tests-my-list'), data, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('picture', response.json()['errors']['fields'])
+
+    def test_base64(self):
+        pic = 'data:image/png;base64,' + base64.b64encode(self.pic).decode()
+        data = {
+            'title': 'test',
+            'picture': pic,
+            'results': [{'resId': 1, 'resText': 'result', 'resPic': pic}],
+            'questions': [{'qId': 1, 'qText': 'question', 'qPic': pic, 'vars': []}],
+        }
+        response = self.client.post(reverse('tests-my-list'), data, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        test = Test.objects.get()
+        for file in [test.picture, test.results.get().picture, test.questions.get().picture]:
+            self.assertEqual(file.read(), self.pic)
+
+        data['picture'] = 'data:image/png;base64,abcde'
+        response = self.client.post(reverse('tests-my-list'), data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('picture', response.json()['errors']['fields'])
+
+    def test_variants(self):
+        data = {
+            'title': 'test',
+            'picture': self.upload_raw(self.pic).json()['handle'],
+            'results': [],
+            'questions': [],
+        }
+        data = self.client.post(reverse('tests-my-list'), data, format='json').json()
+        # the original picture is used until derivatives are generated
+        self.assertEqual({url for formats in data['pictureVariants'].values() for url in formats.values()},
+                         {data['picture']})
+
+        test = Test.objects.get()
+        test.published = True
+        test.save()
+        url = reverse('tests-detail', [test.id])
+        self.client.get(url)
+
+        derivatives.run([test.picture.name], test.id)
+        self.assertIsNone(Test.objects.get().snapshot)
+
+        variants = self.client.get(url).json()['pictureVariants']
+        for size, formats in derivatives.get_names(test.picture.name).items():
+            for fmt, name in formats.items():
+                self.assertEqual(variants[size][fmt], 'https://hypertests.ru/' + test.picture.storage.url(name))
+
+    def test_content_urls(self):
+        handle = self.upload_raw(self.pic).json()['handle']
+        data = {
+            'title': 'test',
+            'results': [{'resId': 1, 'resText': 'result', 'resPic': handle}],
+            'questions': [{'qId': 1, 'qText': 'question', 'qPic': handle, 'vars': []}],
+        }
+        data = self.client.post(reverse('tests-my-list'), data, format='json').json()
+
+        # content stores names of pictures, urls are built for every response
+        Test.objects.update(published=True)
+        test = Test.objects.get()
+        name = test.results.get().picture.name
+        self.assertEqual(json.loads(test.content)['results'][0]['resPic'], name)
+
+        url = 'https://hypertests.ru/' + test.picture.storage.url(name)
+        for response in [data, self.client.get(reverse('tests-detail', [test.id])).json()]:
+            self.assertEqual(response['results'][0]['resPic'], url)
+            self.assertEqual(response['questions'][0]['qPic'], url)
+            for variants in [response['results'][0]['resPicVariants'], response['questions'][0]['qPicVariants']]:
+                self.assertEqual({url for formats in variants.values() for url in formats.values()}, {url})
+
+    def test_release(self):
+        handle = self.upload_raw(self.pic).json()['handle']
+        data = {
+            'title': 'test',
+            'picture': handle,
+            'results': [{'resId': 1, 'resText': 'result', 'resPic': handle}],
+            'questions': [],
+        }
+        self.client.post(reverse('tests-my-list'), data, format='json')
+        test = Test.objects.get()
+        url = reverse('tests-my-detail', [test.id])
+
+        with patch.object(pictures_collector, 'schedule') as schedule:
+            self.assertEqual(self.client.put(url, data, format='json').status_code, 200)
+            schedule.assert_called_once_with([])
+
+            data['results'] = []
+            self.assertEqual(self.client.put(url, data, format='json').status_code, 200)
+            schedule.assert_called_with([test.picture.name])
+
+            self.client.delete(url)
+            schedule.assert_called_with([test.picture.name])
@@ -0,0 +1,174 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+
+from api.auth import token_cache
+from hypertest.main.models import Test, Result, Question, Answer, TestPass
+from tests.api.client import AuthenticatedTestCase
+
+
+class QueriesCountTestCase(AuthenticatedTestCase):
+    def count_queries(self, url):
+        # counts and tokens are cached
+        cache.clear()
+        token_cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response.json()
+
+    def create_tests(self, count, **kwargs):
+        tests = [Test.objects.create(title=f'test {idx}', user=self.user, **kwargs) for idx in range(count)]
+        TestPass.objects.bulk_create([TestPass(test=test, user=self.user) for test in tests[::2]])
+        return tests
+
+    def test_lists_passed_flag(self):
+        for url in [reverse('tests-list'), reverse('tests-my-list'), reverse('tests-passed-list')]:
+            Test.objects.all().delete()
+
+            self.create_tests(1, published=True)
+            queries_count, _ = self.count_queries(url)
+
+            tests = self.create_tests(9, published=True)
+            self.assertEqual(self.count_queries(url)[0], queries_count, url)
+
+            items = {item['id']: item['passed'] for item in self.count_queries(url)[1]['items']}
+            for test in tests:
+                if test.id in items:
+                    self.assertEqual(items[test.id], TestPass.objects.filter(test=test, user=self.user).exists())
+
+    def create_test_content(self, test, questions_count, answers_count):
+        results = [Result.objects.create(test=test, result_id=idx, text=f'result {idx}') for idx in range(2)]
+        for question_idx in range(questions_count):
+            question = Question.objects.create(test=test, question_id=question_idx, text=f'question {question_idx}')
+            for answer_idx in range(answers_count):
+                Answer.objects.create(question=question, answer_id=answer_idx, text=f'answer {answer_idx}',
+                                      result=results[answer_idx % 2] if answer_idx % 3 else None)
+
+    def test_detail(self):
+        small_test = Test.objects.create(title='small', user=self.user, published=True)
+        self.create_test_content(small_test, 1, 1)
+        big_test = Test.objects.create(title='big', user=self.user, published=True)
+        self.create_test_content(big_test, 10, 5)
+        TestPass.objects.create(test=small_test, user=self.user)
+        TestPass.objects.create(test=big_test, user=self.user)
+
+        for url_name in ['tests-detail', 'tests-my-detail', 'tests-passed-detail']:
+            queries_count, _ = self.count_queries(reverse(url_name, [small_test.id]))
+            big_queries_count, data = self.count_queries(reverse(url_name, [big_test.id]))
+            self.assertEqual(big_queries_count, queries_count, url_name)
+
+            self.assertEqual(len(data['questions']), 10)
+            self.assertEqual([answer['res'] for answer in data['questions'][0]['vars']], [None, 1, 0, None, 0])
+
+    def test_detail_content(self):
+        data = self.client.post(reverse('tests-my-list'), self.make_test_data(10, 5), format='json').json()
+        Test.objects.filter(pk=data['id']).update(published=True)
+        TestPass.objects.create(test_id=data['id'], user=self.user)
+
+        # materialized content is read with the test itself
+        for url_name in ['tests-my-detail', 'tests-passed-detail']:
+            token_cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(reverse(url_name, [data['id']]))
+            self.assertEqual(response.json()['questions'], data['questions'])
+            tables = {table for query in context.captured_queries for table in ['test_result', 'test_question']
+                      if f'"{table}"' in query['sql']}
+            self.assertEqual(tables, set(), url_name)
+
+        # content reset by a save outside the api is stored again by the next read
+        Test.objects.get(pk=data['id']).save()
+        self.assertIsNone(Test.objects.get(pk=data['id']).content)
+        self.assertEqual(self.client.get(reverse('tests-my-detail', [data['id']])).json()['questions'],
+                         data['questions'])
+        self.assertIsNotNone(Test.objects.get(pk=data['id']).content)
+
+    @staticmethod
+    def make_test_data(questions_count, answers_count):
+        return {
+            'title': 'title',
+            'results': [{'resId': idx, 'resText': f'result {idx}'} for idx in range(3)],
+            'questions': [
+                {
+                    'qId': question_idx,
+                    'qText': f'question {question_idx}',
+                    'vars': [
+                        {'varId': answer_idx, 'varText': f'answer {answer_idx}', 'res': answer_idx % 3}
+                        for answer_idx in range(answers_count)
+                    ]
+                }
+                for question_idx in range(questions_count)
+            ]
+        }
+
+    def count_write_queries(self, method, url, data):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertIn(response.status_code, [200, 201])
+        writes = [query for query in context.captured_queries
+                  if query['sql'].split()[0] in ['INSERT', 'UPDATE', 'DELETE']]
+        return len(writes), response.json()
+
+    def test_save(self):
+        url_my = reverse('tests-my-list')
+
+        small_writes, _ = self.count_write_queries('post', url_my, self.make_test_data(1, 1))
+        big_writes, data = self.count_write_queries('post', url_my, self.make_test_data(20, 5))
+        self.assertEqual(small_writes, big_writes)
+
+        url = reverse('tests-my-detail', [data['id']])
+        questions_pks = dict(Question.objects.filter(test_id=data['id']).values_list('question_id', 'pk'))
+        answers_pks = set(Answer.objects.filter(question__test_id=data['id']).values_list('pk', flat=True))
+
+        # change one answer, delete one result, one question and one answer, add question
+        payload = self.make_test_data(20, 5)
+        payload['results'].pop()
+        payload['questions'].pop(0)
+        payload['questions'][0]['vars'].pop()
+        payload['questions'][1]['vars'][0]['varText'] = 'changed'
+        for question in payload['questions']:
+            for answer in question['vars']:
+                answer['res'] = answer['res'] if answer['res'] != 2 else None
+        payload['questions'].append({'qId': 100, 'qText': 'new', 'vars': [{'varId': 0, 'varText': 'new', 'res': 0}]})
+
+        writes, data = self.count_write_queries('put', url, payload)
+        self.assertLessEqual(writes, 9)
+
+        self.assertEqual(Result.objects.filter(test_id=data['id']).count(), 2)
+        self.assertEqual(Question.objects.filter(test_id=data['id']).count(), 20)
+        self.assertEqual(Answer.objects.filter(question__test_id=data['id']).count(), 19 * 5 - 1 + 1)
+        self.assertEqual(Answer.objects.filter(question__test_id=data['id'], result__isnull=True).count(), 19)
+
+        # existing rows are updated in place
+        new_questions_pks = dict(Question.objects.filter(test_id=data['id']).values_list('question_id', 'pk'))
+        for question_id in range(1, 20):
+            self.assertEqual(new_questions_pks[question_id], questions_pks[question_id])
+        new_answers_pks = set(Answer.objects.filter(question__test_id=data['id']).values_list('pk', flat=True))
+        self.assertEqual(len(new_answers_pks - answers_pks), 1)
+
+        self.assertEqual(data['questions'][1]['vars'][0]['varText'], 'changed')
+        self.assertEqual(data['questions'][-1]['vars'], [{'varId': 0, 'varText': 'new', 'res': 0}])
+
+    def test_update_validation(self):
+        url_my = reverse('tests-my-list')
+        queries_counts = []
+
+        for questions_count, answers_count in [(1, 1), (20, 5)]:
+            payload = self.make_test_data(questions_count, answers_count)
+            test_id = self.client.post(url_my, payload, format='json').json()['id']
+            payload['questions'][0]['vars'][0]['varText'] = 'changed'
+
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.put(reverse('tests-my-detail', [test_id]), payload, format='json')
+            self.assertEqual(response.status_code, 200)
+
+            # count validation queries issued before the first write
+            queries = []
+            for query in context.captured_queries:
+                if query['sql'].split()[0] in ['INSERT', 'UPDATE', 'DELETE']:
+                    break
+                queries.append(query)
+            queries_counts.append(len(queries))
+
+        self.assertEqual(queries_counts[0], queries_counts[1])
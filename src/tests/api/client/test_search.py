@@ -0,0 +1,65 @@
+from rest_framework.reverse import reverse
+
+from hypertest.main.models import Test
+from tests.api.client import AuthenticatedTestCase
+
+
+class SearchTestCase(AuthenticatedTestCase):
+    url = reverse('tests-list')
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.cat = Test.objects.create(title='Какой ты кот', description='Узнай', user=cls.user, published=True)
+        cls.cats = Test.objects.create(title='Тест', description='Про котов и кошек', user=cls.user, published=True)
+        cls.dog = Test.objects.create(title='Какая ты собака', user=cls.user, published=True)
+        cls.draft = Test.objects.create(title='Кот в черновике', user=cls.user)
+
+    def search(self, q, **params):
+        response = self.client.get(self.url, dict(params, q=q))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def get_ids(self, q):
+        return [item['id'] for item in self.search(q)['items']]
+
+    def test_search(self):
+        # title matches go first
+        self.assertEqual(self.get_ids('кот'), [self.cat.id, self.cats.id])
+        self.assertEqual(self.get_ids('КАКОЙ ты'), [self.cat.id])
+        self.assertEqual(self.get_ids('собака'), [self.dog.id])
+        self.assertEqual(self.get_ids('лошадь'), [])
+        self.assertEqual(self.get_ids('"*'), [])
+
+        my_ids = [item['id'] for item in self.client.get(reverse('tests-my-list'), {'q': 'кот'}).json()['items']]
+        self.assertEqual(set(my_ids), {self.cat.id, self.cats.id, self.draft.id})
+
+    def test_cursor(self):
+        data = self.search('кот', cursor='', page_size=1)
+        self.assertEqual([item['id'] for item in data['items']], [self.cat.id])
+        data = self.search('кот', cursor=data['_metadata']['next_cursor'], page_size=1)
+        self.assertEqual([item['id'] for item in data['items']], [self.cats.id])
+        self.assertIsNone(data['_metadata']['next_cursor'])
+
+        # queries without words are not ranked
+        self.assertEqual(self.search('!!!', cursor='')['items'], [])
+        data = self.search('  ', cursor='', page_size=1)
+        self.assertEqual([item['id'] for item in data['items']], [self.dog.id])
+        data = self.search('  ', cursor=data['_metadata']['next_cursor'], page_size=1)
+        self.assertEqual([item['id'] for item in data['items']], [self.cats.id])
+
+    def test_index_update(self):
+        url_my = reverse('tests-my-list')
+        url = reverse('tests-my-detail', [self.draft.id])
+        data = self.client.get(url).json()
+        data['title'] = 'Собака в черновике'
+        self.assertEqual(self.client.put(url, data, format='json').status_code, 200)
+
+        self.assertEqual([item['id'] for item in self.client.get(url_my, {'q': 'кот'}).json()['items']],
+                         [self.cat.id, self.cats.id])
+        self.assertEqual([item['id'] for item in self.client.get(url_my, {'q': 'собака'}).json()['items']],
+                         [self.draft.id, self.dog.id])
+
+        self.client.delete(url)
+        self.assertEqual([item['id'] for item in self.client.get(url_my, {'q': 'собака'}).json()['items']],
+                         [self.dog.id])
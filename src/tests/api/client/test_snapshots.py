@@ -0,0 +1,103 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+
+from hypertest.main.counters import ImmediatePassedCounter
+from hypertest.main.models import Test, Result, Question, Answer, TestPass
+from tests.api.client import AuthenticatedTestCase
+
+
+class SnapshotTestCase(AuthenticatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.test = Test.objects.create(title='test', user=self.user)
+        result = Result.objects.create(test=self.test, result_id=1, text='result', description='')
+        question = Question.objects.create(test=self.test, question_id=1, text='question')
+        Answer.objects.create(question=question, answer_id=1, text='answer', result=result)
+
+        self.url = reverse('tests-detail', [self.test.id])
+        self.url_my = reverse('tests-my-detail', [self.test.id])
+
+    def publish(self):
+        data = self.client.get(self.url_my).json()
+        data['isPublished'] = True
+        response = self.client.put(self.url_my, data, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def get(self, **headers):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, **headers)
+        content_queried = any('"test_question"' in query['sql'] for query in context.captured_queries)
+        return response, content_queried
+
+    def test_snapshot(self):
+        self.publish()
+        self.assertIsNotNone(Test.objects.get(pk=self.test.pk).snapshot)
+
+        response, content_queried = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(content_queried)
+
+        data = response.json()
+        self.assertEqual(data, self.client.get(self.url_my).json())
+        self.assertEqual(data['questions'][0]['vars'], [{'varId': 1, 'varText': 'answer', 'res': 1}])
+        self.assertEqual(list(data)[-2:], ['passedCount', 'passed'])
+
+    def test_not_stored_snapshot(self):
+        # published without the api
+        Test.objects.filter(pk=self.test.pk).update(published=True)
+
+        response, content_queried = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(content_queried)
+        self.assertEqual(response.json(), self.client.get(self.url_my).json())
+
+        self.assertFalse(self.get()[1])
+
+    def test_reset(self):
+        self.publish()
+
+        test = Test.objects.get(pk=self.test.pk)
+        test.published = False
+        test.save()
+        self.assertIsNone(Test.objects.get(pk=self.test.pk).snapshot)
+
+        Question.objects.filter(test=test).update(text='changed')
+        self.publish()
+        self.assertEqual(self.get()[0].json()['questions'][0]['qText'], 'changed')
+
+    def test_conditional(self):
+        self.publish()
+
+        response, _ = self.get()
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        response, content_queried = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(content_queried)
+        self.assertEqual(response['ETag'], etag)
+
+        # content reset by admin or pictures' derivatives keeps the modification date
+        Question.objects.filter(test=self.test).update(text='changed')
+        Test.objects.filter(pk=self.test.pk).update(content=None, snapshot=None)
+        response, _ = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['questions'][0]['qText'], 'changed')
+        etag = response['ETag']
+
+        # passes change the response
+        ImmediatePassedCounter().increment(self.test)
+        response, _ = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['passedCount'], 1)
+        etag = response['ETag']
+
+        TestPass.objects.record(self.test, self.user)
+        response, _ = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['passed'])
+
+        # other user has not passed the test
+        self.change_user()
+        self.assertNotEqual(self.get()[0]['ETag'], response['ETag'])
@@ -0,0 +1,108 @@
+from unittest import mock
+
+from rest_framework.reverse import reverse
+
+from hypertest.main.counters import ImmediatePassedCounter
+from hypertest.main.models import Test
+from hypertest.main.suggestions import TitleSuggestions, title_suggestions
+from tests.api.client import AuthenticatedTestCase
+
+
+class SuggestionsTestCase(AuthenticatedTestCase):
+    url = reverse('tests-suggest')
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.cat = Test.objects.create(title='Какой ты кот', user=cls.user, published=True, passed_count=5)
+        cls.hedgehog = Test.objects.create(title='Какой ты ёж', user=cls.user, published=True, passed_count=10)
+        cls.dog = Test.objects.create(title='Какая ты собака', user=cls.user, published=True)
+        cls.draft = Test.objects.create(title='Какой ты черновик', user=cls.user)
+
+    def setUp(self) -> None:
+        super().setUp()
+        title_suggestions.clear()
+
+    def tearDown(self) -> None:
+        title_suggestions.clear()
+
+    def get_ids(self, q, **params):
+        response = self.client.get(self.url, dict(params, q=q))
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()['items']]
+
+    def test_suggest(self):
+        self.assertEqual(self.get_ids('как'), [self.hedgehog.id, self.cat.id, self.dog.id])
+        self.assertEqual(self.get_ids('КАКОЙ  ТЫ'), [self.hedgehog.id, self.cat.id])
+        self.assertEqual(self.get_ids('какой ты е'), [self.hedgehog.id])
+        self.assertEqual(self.get_ids('как', limit=1), [self.hedgehog.id])
+        self.assertEqual(self.get_ids('кот'), [])
+        self.assertEqual(self.get_ids(''), [])
+
+        response = self.client.get(self.url, {'q': 'какая'})
+        self.assertEqual(response.json()['items'], [{'id': self.dog.id, 'title': 'Какая ты собака'}])
+
+        with self.assertNumQueries(0):
+            title_suggestions.suggest('как')
+
+    def test_update(self):
+        self.assertEqual(self.get_ids('какой'), [self.hedgehog.id, self.cat.id])
+
+        # instances of the class are shared by tests
+        self.cat, self.hedgehog, self.draft = [Test.objects.get(pk=test.pk)
+                                               for test in [self.cat, self.hedgehog, self.draft]]
+        self.draft.published = True
+        self.draft.passed_count = 7
+        self.draft.save()
+        self.assertEqual(self.get_ids('какой'), [self.hedgehog.id, self.draft.id, self.cat.id])
+
+        self.hedgehog.published = False
+        self.hedgehog.save()
+        self.assertEqual(self.get_ids('какой'), [self.draft.id, self.cat.id])
+
+        self.cat.title = 'Какая ты кошка'
+        self.cat.save()
+        self.assertEqual(self.get_ids('какой'), [self.draft.id])
+        self.assertEqual(self.get_ids('какая'), [self.cat.id, self.dog.id])
+
+        for _ in range(3):
+            ImmediatePassedCounter().increment(self.cat)
+        self.assertEqual(self.get_ids('какой'), [self.draft.id])
+        self.assertEqual(self.get_ids('как'), [self.cat.id, self.draft.id, self.dog.id])
+
+        self.draft.delete()
+        self.assertEqual(self.get_ids('как'), [self.cat.id, self.dog.id])
+
+    def test_tops(self):
+        suggestions = TitleSuggestions(top_size=2, top_prefix_length=2, memo_threshold=1)
+
+        def check():
+            for prefix in ['к', 'ка', 'как', 'какой', 'какой ты к', 'т']:
+                for limit in [1, 2, 3]:
+                    ids = [test_id for test_id, _ in suggestions.suggest(prefix, limit)]
+                    entries = sorted(entry[1:3] for entry in suggestions.titles.values()
+                                     if entry[0].startswith(prefix))
+                    self.assertEqual(ids, [-test_id for _, test_id in entries[:limit]], (prefix, limit))
+
+        check()
+        self.assertIn('какой', suggestions.memo)
+
+        # kept lists are updated with changes instead of being cleared
+        suggestions.update(100, 'Какой ты кит', 7)
+        check()
+        suggestions.passed({self.cat.id: 10, 100: 1})
+        check()
+        suggestions.remove(self.hedgehog.id)
+        check()
+        suggestions.update(self.cat.id, 'Тест', 0)
+        check()
+        suggestions.update(100, 'Какой ты кит', 0)
+        check()
+        self.assertIn('какой', suggestions.memo)
+
+        with self.assertNumQueries(0):
+            suggestions.suggest('ка')
+
+        # forked worker builds its own index
+        with mock.patch('hypertest.main.background.os.getpid', return_value=0), self.assertNumQueries(1):
+            suggestions.suggest('ка')
@@ -0,0 +1,174 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+
+from api.auth import TokenCache, VKUserAuthentication, token_cache
+from hypertest.user.models import VKUser, VKUserToken
+from hypertest.user.tokens import InvalidToken, make_signed_token, verify_signed_token, revoke_signed_tokens, \
+    revocations, get_timestamp
+from tests.api.client import AuthenticatedTestCase
+
+
+class TokenCacheTestCase(AuthenticatedTestCase):
+    url = reverse('profile')
+
+    def setUp(self) -> None:
+        super().setUp()
+        token_cache.clear()
+
+    def get_profile(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        return response, len(context.captured_queries)
+
+    def test_cache(self):
+        hits, misses = token_cache.hits, token_cache.misses
+
+        response, queries_count = self.get_profile()
+        self.assertEqual(response.json(), {'id': self.user.id, 'coins': 0})
+        self.assertEqual(queries_count, 1)
+
+        response, queries_count = self.get_profile()
+        self.assertEqual(response.json(), {'id': self.user.id, 'coins': 0})
+        self.assertEqual(queries_count, 0)
+
+        self.assertEqual((token_cache.hits - hits, token_cache.misses - misses), (1, 1))
+
+    def test_invalidation(self):
+        self.get_profile()
+
+        # coins snapshot is refreshed
+        self.user.coins = 10
+        self.user.save()
+        self.assertEqual(self.get_profile()[0].json()['coins'], 10)
+
+        # rotated token is not accepted anymore
+        VKUserToken.objects.filter(user=self.user).delete()
+        VKUserToken.objects.create(user=self.user)
+        self.assertEqual(self.get_profile()[0].status_code, 401)
+
+    def test_other_process(self):
+        other_cache = TokenCache(version_interval=5)
+        with mock.patch('api.auth.time.monotonic', return_value=100):
+            other_cache.set(self.token, self.user.id, 0)
+            self.assertEqual(other_cache.get(self.token), (self.user.id, 0))
+
+            # the user's version is shared by processes, it is checked every version_interval
+            token_cache.invalidate_user(self.user.id)
+            with mock.patch.object(TokenCache, 'get_version') as get_version:
+                self.assertEqual(other_cache.get(self.token), (self.user.id, 0))
+            get_version.assert_not_called()
+
+        with mock.patch('api.auth.time.monotonic', return_value=106):
+            self.assertIsNone(other_cache.get(self.token))
+
+            other_cache.set(self.token, self.user.id, 0)
+            cache.clear()
+        with mock.patch('api.auth.time.monotonic', return_value=112):
+            self.assertIsNone(other_cache.get(self.token))
+
+    def test_ttl_and_size(self):
+        cache = TokenCache(max_size=2, ttl=10)
+        with mock.patch('api.auth.time.monotonic', return_value=100):
+            cache.set('a', 1, 0)
+            cache.set('b', 2, 0)
+            self.assertEqual(cache.get('a'), (1, 0))
+            cache.set('c', 3, 0)
+
+            # least recently used is evicted
+            self.assertIsNone(cache.get('b'))
+            self.assertEqual(cache.get('c'), (3, 0))
+
+        with mock.patch('api.auth.time.monotonic', return_value=111):
+            self.assertIsNone(cache.get('a'))
+
+
+class SignedTokenTestCase(AuthenticatedTestCase):
+    url = reverse('profile')
+
+    def setUp(self) -> None:
+        super().setUp()
+        revocations.refresh_at = 0
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {make_signed_token(self.user.id)}')
+
+    def test_authentication(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'id': self.user.id, 'coins': 0})
+
+        # no queries are made to authenticate
+        token = make_signed_token(self.user.id)
+        with self.assertNumQueries(0):
+            user, _ = VKUserAuthentication().authenticate_credentials(token)
+        self.assertEqual(user.id, self.user.id)
+
+        # opaque tokens still work
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_invalid(self):
+        token = make_signed_token(self.user.id)
+        key_id, user_id, issued_at, signature = token.split('.')
+
+        invalid_tokens = [
+            f'{key_id}.{int(user_id) + 1}.{issued_at}.{signature}',
+            f'{key_id}.{user_id}.{issued_at}.{signature[:-2]}',
+            f'2.{user_id}.{issued_at}.{signature}',
+            'a.b.c',
+            make_signed_token(self.user.id, get_timestamp() - (settings.SIGNED_TOKENS['ttl'] + 1) * 10 ** 6),
+        ]
+        for token in invalid_tokens:
+            with self.assertRaises(InvalidToken):
+                verify_signed_token(token)
+
+    def test_key_rotation(self):
+        token = make_signed_token(self.user.id)
+
+        config = dict(settings.SIGNED_TOKENS, keys={'1': settings.SIGNED_TOKENS['keys']['1'], '2': 'new'},
+                      current_key='2')
+        with self.settings(SIGNED_TOKENS=config):
+            new_token = make_signed_token(self.user.id)
+            self.assertTrue(new_token.startswith('2.'))
+            self.assertEqual(verify_signed_token(token)[0], self.user.id)
+            self.assertEqual(verify_signed_token(new_token)[0], self.user.id)
+
+        with self.settings(SIGNED_TOKENS=dict(config, keys={'2': 'new'})):
+            self.assertEqual(verify_signed_token(new_token)[0], self.user.id)
+            with self.assertRaises(InvalidToken):
+                verify_signed_token(token)
+
+    def test_revocation(self):
+        token = make_signed_token(self.user.id)
+        revoke_signed_tokens(self.user)
+        new_token = make_signed_token(self.user.id)
+
+        with self.assertRaises(InvalidToken):
+            verify_signed_token(token)
+
+        # other processes load revocations from database
+        revocations.revoked = {}
+        revocations.refresh_at = 0
+        with self.assertRaises(InvalidToken):
+            verify_signed_token(token)
+
+        # tokens issued right after the revocation are accepted
+        self.assertEqual(verify_signed_token(new_token)[0], self.user.id)
+
+    def test_deleted_user(self):
+        user = VKUser.objects.create(id=self.user.id + 1)
+        token = make_signed_token(user.id)
+        self.assertEqual(verify_signed_token(token)[0], user.id)
+
+        user.delete()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_issue(self):
+        with self.settings(SIGNED_TOKENS=dict(settings.SIGNED_TOKENS, enabled=True)), \
+                mock.patch('api.user.views.VKUser.verify_query', return_value=self.user):
+            token = self.client.post(reverse('auth'), {'query': 'query'}, format='json').json()['access_token']
+        self.assertEqual(verify_signed_token(token)[0], self.user.id)
@@ -0,0 +1,64 @@
+import base64
+import json
+from io import BytesIO
+
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.test import SimpleTestCase
+
+from api.parsers import JSONStreamDecoder
+
+
+class JSONStreamDecoderTestCase(SimpleTestCase):
+    picture = bytes(range(256)) * 10
+
+    def decode(self, data: bytes, chunk_size):
+        decoder = JSONStreamDecoder(BytesIO(data), ['picture'])
+        decoder.chunk_size = chunk_size
+        return decoder.decode()
+
+    def test_json(self):
+        documents = [
+            {'title': 'тест "quoted" \\ \n /', 'items': [1, -2.5, 1e3, True, False, None, [], {}],
+             'nested': {'a': [{}]}},
+            [' ', '\\', '\\"', '']
+        ]
+        for document in documents:
+            for data in [json.dumps(document), json.dumps(document, ensure_ascii=False, indent=2),
+                         json.dumps(document).replace('/', '\\/')]:
+                for chunk_size in [1, 2, 3, 7, 64 * 1024]:
+                    self.assertEqual(self.decode(data.encode(), chunk_size), document, (data, chunk_size))
+
+    def test_invalid_json(self):
+        for data in ['', '{', '{"a" 1}', '{"a": 1,}', '[1 2]', '"abc', '{"a": 1} 2', '[nul]', '{1: 2}']:
+            for chunk_size in [1, 64 * 1024]:
+                with self.assertRaises(ValueError, msg=data):
+                    self.decode(data.encode(), chunk_size)
+
+    def test_spooled(self):
+        encoded = base64.b64encode(self.picture).decode()
+        escaped = ''.join('\\u%04x' % ord(char) if idx % 7 == 0 else char for idx, char in enumerate(encoded))
+        for value in [encoded, encoded.replace('/', '\\/'), escaped, '\\n'.join(encoded)]:
+            data = '{"title": "test", "picture": "data:image/png;base64,%s", "other": [1]}' % value
+            for chunk_size in [1, 3, 5, 1000, 64 * 1024]:
+                document = self.decode(data.encode(), chunk_size)
+                self.assertEqual(document['title'], 'test')
+                self.assertEqual(document['other'], [1])
+
+                file = document['picture']
+                self.assertIsInstance(file, TemporaryUploadedFile)
+                self.assertEqual(file.name, 'temp.png')
+                self.assertEqual(file.content_type, 'image/png')
+                self.assertEqual(file.size, len(self.picture))
+                self.assertEqual(file.read(), self.picture)
+
+    def test_not_spooled(self):
+        encoded = base64.b64encode(self.picture).decode()
+        for value in [None, '', 'https://hypertests.ru/media/tests/pic.png', 'data:text', 'upload:1']:
+            self.assertEqual(self.decode(json.dumps({'picture': value}).encode(), 3), {'picture': value})
+
+        # only pictures are spooled
+        data = json.dumps({'title': f'data:image/png;base64,{encoded}'}).encode()
+        self.assertEqual(self.decode(data, 3), {'title': f'data:image/png;base64,{encoded}'})
+
+        data = json.dumps({'picture': 'data:image/png;base64,abcde'}).encode()
+        self.assertEqual(self.decode(data, 3), {'picture': 'data:invalid'})
@@ -0,0 +1,88 @@
+import os
+from copy import deepcopy
+from unittest import mock
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from api.main.serializers import TestSerializer, TestElementListField
+from hypertest.user.models import VKUser
+from tests.api.client import test as client_test
+
+
+class FastValidationTestCase(APITestCase):
+    template = client_test.HyperTestTestCase.template
+
+    with open(os.path.join(os.path.dirname(__file__), 'client', 'pic')) as f:
+        pic = f.read()
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = VKUser.objects.create(id=1)
+
+    def validate(self, data, fast_validation):
+        request = APIRequestFactory().post('/')
+        request.user = self.user
+
+        TestElementListField.fast_validation = fast_validation
+        try:
+            serializer = TestSerializer(data=deepcopy(data), context={'request': request})
+            serializer.is_valid(raise_exception=True)
+            return serializer.validated_data
+        except ValidationError as e:
+            return e.detail
+        finally:
+            TestElementListField.fast_validation = True
+
+    def make_payloads(self):
+        valid = deepcopy(self.template)
+        valid['questions'][0]['qId'] = '0'
+        valid['results'][1]['resText'] = '  spaces  '
+        valid['results'][1]['resPic'] = self.pic
+        valid['questions'][0]['qText'] = ''
+        valid['questions'][1].pop('qPic')
+        valid['questions'][1]['vars'][0]['varId'] = 5.0
+        yield valid
+
+        invalid_res = deepcopy(self.template)
+        invalid_res['questions'][1]['vars'][0]['res'] = 100500
+        yield invalid_res
+
+        duplicates = deepcopy(self.template)
+        duplicates['questions'][1]['qId'] = 0
+        duplicates['questions'][0]['vars'][1]['varId'] = 0
+        yield duplicates
+
+        wrong_types = deepcopy(self.template)
+        wrong_types['results'][0]['resId'] = 'abc'
+        wrong_types['results'][1]['resText'] = 'x' * 256
+        wrong_types['questions'][0]['vars'] = {}
+        wrong_types['questions'][1]['vars'][0] = 'answer'
+        wrong_types['questions'].append({'qId': 2})
+        yield wrong_types
+
+        blank = deepcopy(self.template)
+        blank['questions'][0]['vars'][0]['varText'] = '   '
+        blank['results'][0].pop('resText')
+        yield blank
+
+    def test_same_result(self):
+        for payload in self.make_payloads():
+            fast = self.validate(payload, True)
+            slow = self.validate(payload, False)
+
+            if 'title' in slow:
+                # pictures are different file objects
+                for fast_result, slow_result in zip(fast['results'], slow['results']):
+                    self.assertEqual(bool(fast_result.pop('picture')), bool(slow_result.pop('picture')))
+            self.assertEqual(fast, slow)
+
+    def test_fast_path(self):
+        # valid payload never builds per-item serializers
+        with mock.patch.object(TestElementListField, 'run_obj_validation', side_effect=AssertionError):
+            validated_data = self.validate(next(self.make_payloads()), True)
+
+        self.assertEqual(len(validated_data['questions']), 2)
+        self.assertEqual(validated_data['questions'][1]['answers'][0]['answer_id'], 5)
+        self.assertEqual(validated_data['results'][1]['text'], 'spaces')
@@ -0,0 +1,76 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from hypertest.main.bitmaps import TestsBitmap, build_passed_bitmap, get_passed_bitmap
+from hypertest.main.models import Test, TestPass, PassedBitmap
+from hypertest.user.models import VKUser
+
+
+class TestsBitmapTestCase(TestCase):
+    def test_bitmap(self):
+        ids = [1, 7, 8, 100, 100000]
+        bitmap = TestsBitmap(TestsBitmap.from_ids(ids).to_bytes())
+        self.assertEqual([test_id for test_id in range(100010) if test_id in bitmap], ids)
+        self.assertEqual(len(bitmap), len(ids))
+        self.assertLess(len(bitmap.to_bytes()), 64)
+
+        bitmap.update(TestsBitmap.from_ids([2, 200000]))
+        self.assertEqual([test_id for test_id in range(200010) if test_id in bitmap], sorted(ids + [2, 200000]))
+
+        self.assertNotIn(1, TestsBitmap())
+        self.assertEqual(TestsBitmap().to_bytes(), TestsBitmap(TestsBitmap().to_bytes()).to_bytes())
+
+
+class PassedBitmapTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = VKUser.objects.create(id=1)
+        cls.other_user = VKUser.objects.create(id=2)
+        cls.tests = [Test.objects.create(title=f'test {idx}') for idx in range(3)]
+
+    def test_incremental(self):
+        TestPass.objects.bulk_create([TestPass(test=self.tests[0], user=self.user)])
+        # the bitmap is built from passes on the first request
+        self.assertEqual(len(get_passed_bitmap(self.user.pk)), 1)
+
+        TestPass.objects.record(self.tests[1], self.user)
+        TestPass.objects.record(self.tests[1], self.user)
+        TestPass.objects.create(test=self.tests[2], user=self.other_user)
+
+        bitmap = get_passed_bitmap(self.user.pk)
+        self.assertEqual([test.pk in bitmap for test in self.tests], [True, True, False])
+        self.assertEqual([test.pk in get_passed_bitmap(self.other_user.pk) for test in self.tests],
+                         [False, False, True])
+
+    def test_rebuild(self):
+        TestPass.objects.create(test=self.tests[0], user=self.user)
+        # passes inserted without signals are not in the bitmap until it is rebuilt
+        TestPass.objects.bulk_create([TestPass(test=self.tests[1], user=self.user)])
+        PassedBitmap.objects.create(user=self.other_user)
+
+        call_command('rebuild_passed_bitmaps', stdout=StringIO())
+        bitmap = get_passed_bitmap(self.user.pk)
+        self.assertEqual([test.pk in bitmap for test in self.tests], [True, True, False])
+
+        # passes added to the stored bitmap after the passes were read are kept
+        stored = TestsBitmap.from_ids([self.tests[0].pk, self.tests[2].pk])
+        PassedBitmap.objects.filter(user=self.user).update(bitmap=stored.to_bytes())
+        call_command('rebuild_passed_bitmaps', stdout=StringIO())
+        bitmap = get_passed_bitmap(self.user.pk)
+        self.assertEqual([test.pk in bitmap for test in self.tests], [True, True, True])
+        self.assertFalse(PassedBitmap.objects.filter(user=self.other_user).exists())
+
+    def test_concurrent(self):
+        TestPass.objects.bulk_create([TestPass(test=self.tests[0], user=self.user)])
+
+        def build_concurrently(user_id):
+            # the bitmap is stored by a concurrent request which did not see the pass
+            PassedBitmap.objects.create(user_id=user_id, bitmap=TestsBitmap().to_bytes())
+            return build_passed_bitmap(user_id)
+
+        with patch('hypertest.main.bitmaps.build_passed_bitmap', build_concurrently):
+            self.assertIn(self.tests[0].pk, get_passed_bitmap(self.user.pk))
+        self.assertIn(self.tests[0].pk, get_passed_bitmap(self.user.pk))
@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from hypertest.main.collector import pictures_collector
+from hypertest.main.derivatives import derivatives
+from hypertest.main.models import Test, PictureUpload
+from hypertest.main.storage import pictures_storage
+from hypertest.user.models import VKUser
+from tests import TemporaryMediaMixin
+
+
+class CollectPicturesTestCase(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        # the state is kept outside of the media
+        self.state_dir = tempfile.mkdtemp(prefix='hypertest-collect-pictures-')
+        self.state = os.path.join(self.state_dir, 'state')
+        self.test = Test.objects.create(title='test')
+        self.test.picture.save('temp.png', ContentFile(b'referenced'))
+        self.referenced = self.test.picture.name
+        self.unreferenced = pictures_storage.save('temp.png', ContentFile(b'unreferenced'))
+        self.derivatives = [default_storage.save(derivatives.get_names(name)['320']['jpeg'], ContentFile(b'jpeg'))
+                            for name in [self.referenced, self.unreferenced]]
+        self.names = [self.referenced, self.unreferenced] + self.derivatives
+
+    def tearDown(self):
+        for name in self.names:
+            pictures_storage.delete(name)
+        shutil.rmtree(self.state_dir)
+
+    def call(self, *args):
+        stdout = StringIO()
+        call_command('collect_pictures', '--state', self.state, *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def make_old(self):
+        modified = time.time() - pictures_collector.grace_period - 1
+        for name in self.names:
+            os.utime(pictures_storage.path(name), (modified, modified))
+
+    def assertExisting(self, names):
+        self.assertEqual([name for name in self.names if pictures_storage.exists(name)], names)
+
+    def test_collect(self):
+        # recently modified files are kept
+        self.call()
+        self.assertExisting(self.names)
+
+        self.make_old()
+        self.call('--dry-run')
+        self.assertExisting(self.names)
+
+        self.assertIn('deleted 2', self.call())
+        self.assertExisting([self.referenced, self.derivatives[0]])
+        self.assertFalse(os.path.exists(self.state))
+
+    def test_resume(self):
+        self.make_old()
+        with open(self.state, 'w') as f:
+            f.write(self.derivatives[1])
+
+        # derivatives are before pictures, the position itself is not checked again
+        output = self.call('--batch-size', '1')
+        self.assertTrue(output.startswith(f'Resuming after {self.derivatives[1]}'))
+        self.assertExisting([self.referenced] + self.derivatives)
+
+        self.call('--restart')
+        self.assertExisting([self.referenced, self.derivatives[0]])
+
+    def test_expired_uploads(self):
+        user = VKUser.objects.create(id=1)
+        PictureUpload.objects.create(user=user, file=self.unreferenced)
+        self.make_old()
+
+        # the handle may be used yet
+        self.call()
+        self.assertExisting(self.names)
+
+        PictureUpload.objects.update(date=timezone.now() - timedelta(seconds=pictures_collector.upload_ttl + 1))
+        self.assertIn('Expired 1 uploads', self.call())
+        self.assertFalse(PictureUpload.objects.exists())
+        self.assertExisting([self.referenced, self.derivatives[0]])
+
+    def test_release(self):
+        pictures = [self.referenced, self.unreferenced]
+        self.assertEqual(pictures_collector.release(pictures), [])
+
+        self.make_old()
+        self.assertEqual(pictures_collector.release(pictures), [self.unreferenced])
+        self.assertExisting([self.referenced, self.derivatives[0]])
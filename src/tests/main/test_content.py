@@ -0,0 +1,32 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+from hypertest.main.models import Test, Result, Question, Answer
+
+
+class TestContentCommandTestCase(TestCase):
+    def call(self, *args):
+        call_command('test_content', *args, stdout=StringIO(), stderr=StringIO())
+
+    def test_backfill_and_verify(self):
+        test = Test.objects.create(title='test')
+        result = Result.objects.create(test=test, result_id=1, text='result')
+        question = Question.objects.create(test=test, question_id=1, text='question')
+        Answer.objects.create(question=question, answer_id=1, text='answer', result=result)
+        empty_test = Test.objects.create(title='empty')
+
+        self.call()
+        content = json.loads(Test.objects.get(pk=test.pk).content)
+        self.assertEqual(content['results'], [{'resId': 1, 'resText': 'result', 'resDesc': None, 'resPic': None,
+                                              'resPicVariants': None}])
+        self.assertEqual(content['questions'][0]['vars'], [{'varId': 1, 'varText': 'answer', 'res': 1}])
+        self.assertEqual(json.loads(Test.objects.get(pk=empty_test.pk).content), {'results': [], 'questions': []})
+
+        self.call('--verify')
+
+        Answer.objects.update(text='changed')
+        with self.assertRaises(CommandError):
+            self.call('--verify')
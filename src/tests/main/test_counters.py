@@ -0,0 +1,42 @@
+from django.test import TestCase
+
+from hypertest.main.counters import BufferedPassedCounter, ImmediatePassedCounter
+from hypertest.main.models import Test
+
+
+class PassedCounterTestCase(TestCase):
+    def test_immediate(self):
+        test = Test.objects.create(title='test', passed_count=5)
+        modification_date = test.modification_date
+
+        # the stale instance does not overwrite concurrent increments
+        Test.objects.filter(pk=test.pk).update(passed_count=10)
+        ImmediatePassedCounter().increment(test)
+
+        test.refresh_from_db()
+        self.assertEqual(test.passed_count, 11)
+        self.assertEqual(test.modification_date, modification_date)
+
+    def test_buffered(self):
+        test_1 = Test.objects.create(title='test 1')
+        test_2 = Test.objects.create(title='test 2', passed_count=1)
+
+        counter = BufferedPassedCounter(flush_interval=3600)
+        for _ in range(3):
+            counter.add(test_1.pk)
+        counter.add(test_2.pk)
+        counter.add(test_2.pk)
+
+        # nothing is written until flush
+        test_1.refresh_from_db()
+        self.assertEqual(test_1.passed_count, 0)
+
+        counter.flush()
+        test_1.refresh_from_db()
+        test_2.refresh_from_db()
+        self.assertEqual(test_1.passed_count, 3)
+        self.assertEqual(test_2.passed_count, 3)
+
+        counter.flush()
+        test_1.refresh_from_db()
+        self.assertEqual(test_1.passed_count, 3)
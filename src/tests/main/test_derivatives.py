@@ -0,0 +1,52 @@
+import base64
+import os
+
+from PIL import Image
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase
+
+from hypertest.main.derivatives import Derivatives
+from hypertest.main.signals import derivatives_ready
+from tests import TemporaryMediaMixin
+
+
+class DerivativesTestCase(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        with open(os.path.join(os.path.dirname(__file__), '..', 'api', 'client', 'pic')) as f:
+            pic = base64.b64decode(f.read().split(';base64,')[1])
+        self.name = default_storage.save('pictures/pic.png', ContentFile(pic))
+        self.derivatives = Derivatives(sizes=[16, 32], formats=['jpeg'], workers=0)
+
+    def tearDown(self):
+        for formats in self.derivatives.get_names(self.name).values():
+            for name in formats.values():
+                default_storage.delete(name)
+        default_storage.delete(self.name)
+
+    def test_generate(self):
+        self.assertFalse(self.derivatives.is_ready(self.name))
+        self.derivatives.generate(self.name)
+        self.assertTrue(self.derivatives.is_ready(self.name))
+
+        for size, formats in self.derivatives.get_names(self.name).items():
+            with default_storage.open(formats['jpeg']) as file:
+                image = Image.open(file)
+                self.assertEqual(image.format, 'JPEG')
+                self.assertLessEqual(max(image.size), int(size))
+
+    def test_run(self):
+        sent = []
+
+        def receiver(**kwargs):
+            sent.append((kwargs['names'], kwargs['test_id']))
+
+        derivatives_ready.connect(receiver)
+        try:
+            with self.assertLogs('hypertest.main.derivatives', 'ERROR'):
+                self.derivatives.run([self.name, 'pictures/missing.png'], 1)
+        finally:
+            derivatives_ready.disconnect(receiver)
+
+        self.assertEqual(sent, [([self.name], 1)])
+        self.assertFalse(self.derivatives.is_ready('pictures/missing.png'))
@@ -0,0 +1,20 @@
+from django.test import TestCase
+
+from hypertest.main.models import Test, TestPass
+from hypertest.user.models import VKUser
+
+
+class TestPassManagerTestCase(TestCase):
+    def test_record(self):
+        user = VKUser.objects.create(id=1)
+        test = Test.objects.create(title='test')
+
+        self.assertTrue(TestPass.objects.record(test, user))
+        date = TestPass.objects.get().date
+
+        self.assertFalse(TestPass.objects.record(test, user))
+        self.assertEqual(TestPass.objects.count(), 1)
+        self.assertGreater(TestPass.objects.get().date, date)
+
+        self.assertTrue(TestPass.objects.record(test, VKUser.objects.create(id=2)))
+        self.assertEqual(TestPass.objects.count(), 2)
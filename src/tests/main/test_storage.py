@@ -0,0 +1,43 @@
+import os
+
+from django.core.files.base import ContentFile
+from django.test import TestCase
+
+from hypertest.main.models import Test, Result
+from hypertest.main.references import count_references, release_pictures
+from hypertest.main.storage import pictures_storage
+from tests import TemporaryMediaMixin
+
+
+class HashedStorageTestCase(TemporaryMediaMixin, TestCase):
+    def tearDown(self):
+        release_pictures([self.name])
+
+    def test_deduplication(self):
+        self.name = pictures_storage.save('tests/temp.PNG', ContentFile(b'content'))
+        self.assertRegex(self.name, r'^pictures/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}\.png$')
+        inode = os.stat(pictures_storage.path(self.name)).st_ino
+
+        self.assertEqual(pictures_storage.save('tests-results/other.png', ContentFile(b'content')), self.name)
+        self.assertEqual(os.stat(pictures_storage.path(self.name)).st_ino, inode)
+        self.assertEqual(len(os.listdir(os.path.dirname(pictures_storage.path(self.name)))), 1)
+
+        other = pictures_storage.save('temp.png', ContentFile(b'other'))
+        self.assertNotEqual(other, self.name)
+        release_pictures([other])
+
+    def test_references(self):
+        test = Test.objects.create(title='test')
+        test.picture.save('temp.png', ContentFile(b'content'))
+        self.name = test.picture.name
+        result = Result.objects.create(test=test, result_id=1, text='result', picture=self.name)
+
+        self.assertEqual(count_references([self.name, 'pictures/missing.png']), {self.name: 2})
+
+        self.assertEqual(release_pictures([self.name]), [])
+        self.assertTrue(pictures_storage.exists(self.name))
+
+        result.delete()
+        Test.objects.filter(pk=test.pk).update(picture=None)
+        self.assertEqual(release_pictures([self.name]), [self.name])
+        self.assertFalse(pictures_storage.exists(self.name))